@@ -0,0 +1,35 @@
+"""JSON encode/decode helpers that use orjson when it is installed.
+
+``dumps`` always returns compact UTF-8 bytes and ``loads`` accepts either
+bytes or str, so call sites behave the same with or without orjson.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so one except clause
+# covers both backends.
+JSONDecodeError = json.JSONDecodeError
+
+if orjson is not None:
+    dumps = orjson.dumps
+    loads = orjson.loads
+else:  # pragma: no cover - exercised only without orjson
+    _encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+    def dumps(obj: Any) -> bytes:
+        return _encoder.encode(obj).encode()
+
+    loads = json.loads
+
+
+def dumps_text(obj: Any) -> str:
+    """Serialize ``obj`` to a compact JSON string."""
+    return dumps(obj).decode()
@@ -1,16 +1,22 @@
 from __future__ import annotations
 
-import json
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional, Type
+from typing import Dict, Iterator, List, Optional, Sequence, Type
 
 try:
     import yaml  # type: ignore
 except ImportError:  # pragma: no cover
     yaml = None
 
+if yaml is not None:
+    # libyaml's C loader is much faster than the pure-Python SafeLoader.
+    _YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+from .fastjson import JSONDecodeError, dumps, loads
 from .providers.base import AIProvider, ProviderConfig, TestContext
 from .providers.claude import ClaudeProvider
 from .providers.openai_provider import OpenAIProvider
@@ -23,6 +29,10 @@ PROVIDERS: Dict[str, Type[AIProvider]] = {
 }
 
 
+# "${VAR}" placeholders in config values are read from the environment.
+_ENV_RE = re.compile(r"^\$\{([^}]+)\}\s*$")
+
+
 class GenerationConfigError(Exception):
     pass
 
@@ -34,20 +44,56 @@ class AIConfig:
 
 
 def _resolve_env(value: Optional[str]) -> Optional[str]:
-    if not value or not value.startswith("${"):
-        return value
-    env_var = value.strip()[2:-1]
-    return os.environ.get(env_var)
+    match = _ENV_RE.match(value) if value else None
+    return os.environ.get(match.group(1)) if match else value
+
+
+def _config_cache_path(config_path: Path) -> Path:
+    return config_path.with_name(config_path.name + ".cache.json")
+
+
+def _read_config_cache(cache_path: Path, stat: os.stat_result) -> Optional[Dict]:
+    """Return cached config data if it was written for this exact config file."""
+    try:
+        cached = loads(cache_path.read_bytes())
+    except (OSError, JSONDecodeError):
+        return None
+    if not isinstance(cached, dict):
+        return None
+    if cached.get("mtime_ns") != stat.st_mtime_ns or cached.get("size") != stat.st_size:
+        return None
+    return cached.get("data")
+
+
+def _write_config_cache(cache_path: Path, stat: os.stat_result, data) -> None:
+    try:
+        cache_path.write_bytes(dumps({"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "data": data}))
+    except (OSError, TypeError, ValueError):
+        # Unwritable directory or YAML types JSON can't represent; parse again next time.
+        pass
+
+
+def _load_config_data(config_path: Path):
+    try:
+        stat = config_path.stat()
+    except FileNotFoundError:
+        return {}
+
+    cache_path = _config_cache_path(config_path)
+    data = _read_config_cache(cache_path, stat)
+    if data is not None:
+        return data
+
+    if yaml is None:
+        raise GenerationConfigError("PyYAML is required to parse config.yaml. Install with 'pip install pyyaml'.")
+    with config_path.open() as handle:
+        data = yaml.load(handle, Loader=_YamlLoader) or {}
+    _write_config_cache(cache_path, stat, data)
+    return data
 
 
 def load_ai_config(config_path: Path) -> AIConfig:
-    if config_path.exists():
-        if yaml is None:
-            raise GenerationConfigError("PyYAML is required to parse config.yaml. Install with 'pip install pyyaml'.")
-        with config_path.open() as handle:
-            data = yaml.safe_load(handle) or {}
-    else:
-        data = {}
+    data = _load_config_data(config_path)
 
     ai_block = data.get("ai", {}) if isinstance(data, dict) else {}
     default_provider = ai_block.get("default_provider", "claude")
@@ -80,21 +126,38 @@ def get_provider(name: str, config: AIConfig) -> AIProvider:
     return provider_cls(provider_config)
 
 
+def generate_many(contexts: Sequence[TestContext], provider: AIProvider, max_workers: int = 8) -> List[str]:
+    """Run ``provider.generate_test`` for each context concurrently, preserving order."""
+    if len(contexts) <= 1:
+        return [provider.generate_test(context) for context in contexts]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(contexts))) as executor:
+        return list(executor.map(provider.generate_test, contexts))
+
+
+def _iter_specs(root: str) -> Iterator[str]:
+    """Yield paths of ``*.spec.*`` files under ``root`` using cached DirEntry types."""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_specs(entry.path)
+            elif ".spec." in entry.name:
+                yield entry.path
+
+
 def build_context(tanda: Dict, repo_root: Path) -> TestContext:
     app_url = None
     config_file = repo_root / "tanda.json"
     if config_file.exists():
         try:
-            data = json.loads(config_file.read_text())
+            data = loads(config_file.read_bytes())
             app_url = data.get("app_url")
-        except json.JSONDecodeError:
+        except JSONDecodeError:
             pass
 
     test_files = []
     tests_dir = repo_root / "tests"
     if tests_dir.exists():
-        for file in tests_dir.glob("**/*.spec.*"):
-            test_files.append(str(file.relative_to(repo_root)))
+        test_files = [os.path.relpath(path, repo_root) for path in _iter_specs(str(tests_dir))]
 
     coverage = tanda.get("covers", [])
-    return TestContext(tanda=tanda, app_url=app_url, existing_tests=test_files, coverage_tags=coverage)
+    return TestContext(tanda=tanda, app_url=app_url, existing_tests=tuple(test_files), coverage_tags=tuple(coverage))
@@ -1,8 +1,19 @@
 from __future__ import annotations
 
+import time
+import urllib.error
 from dataclasses import dataclass
-from textwrap import dedent
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from ..fastjson import loads
+from .transport import post
+
+# Rate limiting and transient server failures are worth another attempt.
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+# Network errors raised before the request reached the server. Others (timeouts,
+# resets) may come after the POST was sent, and resending would bill twice.
+RETRYABLE_REASONS = (ConnectionRefusedError,)
 
 
 @dataclass
@@ -13,12 +24,12 @@ class ProviderConfig:
     extra: Optional[Dict[str, str]] = None
 
 
-@dataclass
+@dataclass(frozen=True)
 class TestContext:
     tanda: Dict
     app_url: Optional[str] = None
-    existing_tests: Optional[List[str]] = None
-    coverage_tags: Optional[List[str]] = None
+    existing_tests: Optional[Tuple[str, ...]] = None
+    coverage_tags: Optional[Tuple[str, ...]] = None
 
 
 class GenerationProviderError(Exception):
@@ -29,31 +40,93 @@ class AIProvider:
     """Abstract base for AI providers."""
 
     provider_name = "base"
+    display_name = "Base"
+    api_key_env = ""
+    max_attempts = 3
+    retry_backoff = 1.0
 
     def __init__(self, config: ProviderConfig):
         self.config = config
 
     def generate_test(self, context: TestContext) -> str:
+        prompt = self.build_prompt(context)
+        if not self.config.api_key:
+            return self._missing_key_message(prompt)
+
+        # Serialize once; retries resend the same bytes.
+        url, headers, body = self._build_request(prompt)
+        return self._parse_response(self._send(url, headers, body))
+
+    def _build_request(self, prompt: str) -> Tuple[str, Dict[str, str], bytes]:
+        """Return (url, headers, JSON body bytes) for a generation request."""
+        raise NotImplementedError("Implement in subclass")
+
+    def _parse_response(self, data: Dict) -> str:
         raise NotImplementedError("Implement in subclass")
 
+    def _send(self, url: str, headers: Dict[str, str], body: bytes) -> Dict:
+        attempt = 1
+        while True:
+            try:
+                return loads(post(url, body, headers, timeout=60))
+            except urllib.error.HTTPError as exc:
+                if attempt >= self.max_attempts or exc.code not in RETRYABLE_STATUS:
+                    detail = exc.read().decode() if exc.fp else str(exc)
+                    raise GenerationProviderError(f"{self.display_name} API error: {detail}")
+            except urllib.error.URLError as exc:
+                if attempt >= self.max_attempts or not isinstance(exc.reason, RETRYABLE_REASONS):
+                    raise GenerationProviderError(f"{self.display_name} network error: {exc}")
+            time.sleep(self.retry_backoff * attempt)
+            attempt += 1
+
+    def _missing_key_message(self, prompt: str) -> str:
+        return "\n".join([
+            f"# {self.display_name} provider not configured",
+            f"# Set {self.api_key_env} or edit .tandas/config.yaml to enable live generation.",
+            "",
+            prompt,
+        ])
+
     @staticmethod
     def build_prompt(context: TestContext) -> str:
         tanda = context.tanda
-        title = tanda.get("title", "Unnamed Tandas entry")
-        coverage = ", ".join(context.coverage_tags or tanda.get("covers", [])) or "(not specified)"
-        file_hint = tanda.get("file") or "tests/generated/<slug>.spec.ts"
-        deps = ", ".join(tanda.get("depends_on", [])) or "none"
-        return dedent(
-            f"""
-            Generate a Playwright test for "{title}".
-
-            Requirements:
-            - File path hint: {file_hint}
-            - Coverage tags: {coverage}
-            - Depends on: {deps}
-            - Application URL: {context.app_url or 'unknown'}
-            - Reference existing tests: {', '.join(context.existing_tests or []) or 'none'}
-
-            Respond with runnable TypeScript Playwright test code and a short comment header summarizing intent.
-            """
-        ).strip()
+        return _render_prompt(
+            tanda.get("title", "Unnamed Tandas entry"),
+            tanda.get("file") or "tests/generated/<slug>.spec.ts",
+            tuple(context.coverage_tags or tanda.get("covers", [])),
+            tuple(tanda.get("depends_on", [])),
+            context.app_url,
+            tuple(context.existing_tests or ()),
+        )
+
+
+_PROMPT_TEMPLATE = """\
+Generate a Playwright test for "{title}".
+
+Requirements:
+- File path hint: {file_hint}
+- Coverage tags: {coverage}
+- Depends on: {deps}
+- Application URL: {app_url}
+- Reference existing tests: {existing_tests}
+
+Respond with runnable TypeScript Playwright test code and a short comment header summarizing intent."""
+
+
+@lru_cache(maxsize=256)
+def _render_prompt(
+    title: str,
+    file_hint: str,
+    coverage_tags: Tuple[str, ...],
+    depends_on: Tuple[str, ...],
+    app_url: Optional[str],
+    existing_tests: Tuple[str, ...],
+) -> str:
+    return _PROMPT_TEMPLATE.format_map({
+        "title": title,
+        "file_hint": file_hint,
+        "coverage": ", ".join(coverage_tags) or "(not specified)",
+        "deps": ", ".join(depends_on) or "none",
+        "app_url": app_url or "unknown",
+        "existing_tests": ", ".join(existing_tests) or "none",
+    })
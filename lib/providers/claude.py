@@ -1,10 +1,9 @@
 from __future__ import annotations
 
-import json
-import urllib.error
-import urllib.request
+from typing import Dict, Tuple
 
-from .base import AIProvider, GenerationProviderError, ProviderConfig, TestContext
+from ..fastjson import dumps, dumps_text
+from .base import AIProvider, GenerationProviderError
 
 
 ANTHROPIC_URL = "https://api.anthropic.com/v1/messages"
@@ -12,14 +11,11 @@ ANTHROPIC_URL = "https://api.anthropic.com/v1/messages"
 
 class ClaudeProvider(AIProvider):
     provider_name = "claude"
+    display_name = "Claude"
+    api_key_env = "ANTHROPIC_API_KEY"
 
-    def generate_test(self, context: TestContext) -> str:
-        prompt = self.build_prompt(context)
+    def _build_request(self, prompt: str) -> Tuple[str, Dict[str, str], bytes]:
         model = self.config.model or "claude-3-5-sonnet-20240620"
-
-        if not self.config.api_key:
-            return self._missing_key_message(prompt)
-
         payload = {
             "model": model,
             "max_tokens": 1200,
@@ -30,27 +26,14 @@ class ClaudeProvider(AIProvider):
                 }
             ],
         }
+        headers = {
+            "content-type": "application/json",
+            "x-api-key": self.config.api_key,
+            "anthropic-version": "2023-06-01",
+        }
+        return ANTHROPIC_URL, headers, dumps(payload)
 
-        req = urllib.request.Request(
-            ANTHROPIC_URL,
-            data=json.dumps(payload).encode(),
-            headers={
-                "content-type": "application/json",
-                "x-api-key": self.config.api_key,
-                "anthropic-version": "2023-06-01",
-            },
-            method="POST",
-        )
-
-        try:
-            with urllib.request.urlopen(req, timeout=60) as resp:
-                data = json.loads(resp.read().decode())
-        except urllib.error.HTTPError as exc:  # pragma: no cover - network
-            detail = exc.read().decode() if exc.fp else str(exc)
-            raise GenerationProviderError(f"Claude API error: {detail}")
-        except urllib.error.URLError as exc:  # pragma: no cover - network
-            raise GenerationProviderError(f"Claude network error: {exc}")
-
+    def _parse_response(self, data: Dict) -> str:
         content = data.get("content") or []
         if not content:
             raise GenerationProviderError("Claude returned empty response")
@@ -58,14 +41,5 @@ class ClaudeProvider(AIProvider):
         segment = content[0]
         text = segment.get("text") if isinstance(segment, dict) else None
         if not text:
-            text = json.dumps(data)
+            text = dumps_text(data)
         return text
-
-    @staticmethod
-    def _missing_key_message(prompt: str) -> str:
-        return "\n".join([
-            "# Claude provider not configured",
-            "# Set ANTHROPIC_API_KEY or edit .tandas/config.yaml to enable live generation.",
-            "",
-            prompt,
-        ])
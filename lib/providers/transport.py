@@ -0,0 +1,103 @@
+"""Keep-alive HTTPS transport shared by the AI providers.
+
+``urllib.request.urlopen`` opens a fresh TCP+TLS connection for every call.
+``post`` keeps one ``http.client`` connection per host and thread, so batch
+generation only pays the handshake once per provider. Requests that the
+environment routes through a proxy (``HTTPS_PROXY`` etc., minus ``NO_PROXY``)
+still go through ``urlopen``, which knows how to talk to proxies. Failures are
+raised as ``urllib.error.HTTPError``/``URLError`` so providers handle them as
+before. A request is never resent here: once the bytes may have reached the
+server, whether to retry is the caller's decision.
+"""
+
+from __future__ import annotations
+
+import http.client
+import io
+import select
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, Tuple
+
+# http.client connections are not thread-safe, so each thread keeps its own.
+_local = threading.local()
+
+def _connections() -> Dict[Tuple[str, str], http.client.HTTPConnection]:
+    pool = getattr(_local, "connections", None)
+    if pool is None:
+        pool = _local.connections = {}
+    return pool
+
+
+def _connect(scheme: str, netloc: str, timeout: float) -> http.client.HTTPConnection:
+    if scheme == "https":
+        return http.client.HTTPSConnection(netloc, timeout=timeout)
+    return http.client.HTTPConnection(netloc, timeout=timeout)
+
+
+def _is_stale(conn: http.client.HTTPConnection) -> bool:
+    """True if an idle pooled connection was closed by the server.
+
+    An idle keep-alive socket only becomes readable when the server hung up
+    (or sent something unsolicited), so it must not carry another request.
+    """
+    if conn.sock is None:
+        return False
+    readable, _, _ = select.select([conn.sock], [], [], 0)
+    return bool(readable)
+
+
+def _request(conn, path: str, body: bytes, headers: Dict[str, str], timeout: float):
+    conn.timeout = timeout
+    if conn.sock is not None:
+        conn.sock.settimeout(timeout)
+    conn.request("POST", path, body=body, headers=headers)
+    resp = conn.getresponse()
+    return resp, resp.read()
+
+
+def _uses_proxy(scheme: str, host: str) -> bool:
+    return scheme in urllib.request.getproxies() and not urllib.request.proxy_bypass(host)
+
+
+def _post_via_urlopen(url: str, body: bytes, headers: Dict[str, str], timeout: float) -> bytes:
+    request = urllib.request.Request(url, data=body, headers=headers, method="POST")
+    with urllib.request.urlopen(request, timeout=timeout) as resp:
+        return resp.read()
+
+
+def post(url: str, body: bytes, headers: Dict[str, str], timeout: float = 60) -> bytes:
+    """POST ``body`` to ``url`` over a pooled connection and return the response body."""
+    parts = urllib.parse.urlsplit(url)
+    if _uses_proxy(parts.scheme, parts.hostname or ""):
+        return _post_via_urlopen(url, body, headers, timeout)
+
+    path = parts.path or "/"
+    if parts.query:
+        path = f"{path}?{parts.query}"
+
+    key = (parts.scheme, parts.netloc)
+    pool = _connections()
+    conn = pool.get(key)
+    if conn is None:
+        conn = pool[key] = _connect(parts.scheme, parts.netloc, timeout)
+    elif _is_stale(conn):
+        # Closing makes the next request reconnect before anything is sent.
+        conn.close()
+
+    try:
+        resp, data = _request(conn, path, body, headers, timeout)
+    except (OSError, http.client.HTTPException) as exc:
+        conn.close()
+        pool.pop(key, None)
+        raise urllib.error.URLError(exc) from exc
+
+    if resp.will_close:
+        conn.close()
+        pool.pop(key, None)
+
+    if resp.status >= 400:
+        raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, io.BytesIO(data))
+    return data
@@ -8,36 +8,53 @@ tandas are never closed - they track the living history of your test suite.
 Statuses: active | flaky | deprecated (never "closed")
 """
 
-import argparse
-import hashlib
-import json
+import atexit
+import functools
+import heapq
 import os
-import shutil
-import socket
+import re
 import sqlite3
-import subprocess
 import sys
 import time
+from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
-from textwrap import dedent
 from typing import List, Optional
 
-from lib.generator import (
-    GenerationConfigError,
-    build_context,
-    get_provider,
-    load_ai_config,
-)
-from lib.generator import PROVIDERS  # noqa: E402
-from lib.providers.base import GenerationProviderError
+from lib.fastjson import JSONDecodeError, dumps, dumps_text, loads
 
 TANDA_DIR = Path(".tandas")
 ISSUES_FILE = TANDA_DIR / "issues.jsonl"
 DB_FILE = TANDA_DIR / "db.sqlite"
+SCHEMA_VERSION = 3  # PRAGMA user_version of an up-to-date cache (see init_db)
 TRACE_INBOX_FILE = TANDA_DIR / "trace_inbox.jsonl"
 VERSION = "0.2.0"
 
+# Files under TANDA_DIR that belong to this machine and are never staged.
+LOCAL_ONLY_FILES = ("db.sqlite-wal", "db.sqlite-shm", "config.yaml.cache.json")
+
+# Keys of lib.generator.PROVIDERS, for --help text. Listed here so building the
+# argument parser does not import the provider modules (and yaml); the values
+# themselves are checked against the real registry by _provider_choice.
+PROVIDER_NAMES = ("claude", "gemini", "openai")
+
+# Test files picked up by `td discover`
+TEST_FILE_PATTERNS = ("*.spec.ts", "*.spec.js", "*.test.ts", "*.test.js")
+TEST_FILE_RE = re.compile(r"\.(spec|test)\.(ts|js)$")
+
+# Allowed values for --status, --run-result and trace link --result.
+_STATUSES = ("active", "flaky", "deprecated")
+_RUN_RESULTS = ("pass", "fail", "skip")
+_TRACE_RESULTS = _RUN_RESULTS + ("unknown",)
+
+# Number of most recent runs that count toward a tanda's flakiness score.
+FLAKINESS_WINDOW = 10
+
+# Partial IDs this long are looked up through the short_id index (td-<8 hex>).
+SHORT_ID_LEN = 8
+# Compact issues.jsonl once it holds this many lines per live tanda.
+COMPACT_RATIO = 2
+
 # ANSI colors
 GREEN = "\033[92m"
 YELLOW = "\033[93m"
@@ -54,20 +71,31 @@ DEFAULT_DAEMON_BIN = "td-daemon"
 
 def now_iso() -> str:
     """Return current timestamp in ISO format."""
-    return datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+    return datetime.now().isoformat(timespec="seconds")
 
 
 def generate_id(title: str) -> str:
     """Generate a unique tanda ID from title."""
-    hash_val = hashlib.sha1(f"{title}{now_iso()}".encode()).hexdigest()[:8]
+    import hashlib
+
+    hash_val = hashlib.blake2b(f"{title}{now_iso()}".encode(), digest_size=4).hexdigest()
     return f"td-{hash_val}"
 
 
 def init_db(conn: sqlite3.Connection):
     """Initialize SQLite schema with full tanda structure."""
+    # These settings are per connection; WAL mode is stored in the database file.
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    # A cache already at the current schema version needs no DDL.
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return
+
     conn.executescript("""
+        PRAGMA journal_mode=WAL;
         CREATE TABLE IF NOT EXISTS tandas (
             id TEXT PRIMARY KEY,
+            short_id TEXT,  -- Last SHORT_ID_LEN characters of id (the hash part)
             title TEXT NOT NULL,
             status TEXT DEFAULT 'active',
             file TEXT,
@@ -82,19 +110,88 @@ def init_db(conn: sqlite3.Connection):
             updated_at TEXT
         );
         CREATE INDEX IF NOT EXISTS idx_status ON tandas(status);
+        CREATE INDEX IF NOT EXISTS idx_status_updated ON tandas(status, updated_at);
         CREATE INDEX IF NOT EXISTS idx_file ON tandas(file);
         CREATE INDEX IF NOT EXISTS idx_flakiness ON tandas(flakiness_score);
         CREATE INDEX IF NOT EXISTS idx_last_run ON tandas(last_run_at);
+        CREATE TABLE IF NOT EXISTS tanda_covers (
+            tanda_id TEXT NOT NULL,
+            cover TEXT NOT NULL,  -- One entry of the tanda's covers array
+            PRIMARY KEY (tanda_id, cover)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_covers_cover ON tanda_covers(cover);
+        CREATE TABLE IF NOT EXISTS trace_inbox (
+            seq INTEGER PRIMARY KEY,  -- Line position in trace_inbox.jsonl
+            path TEXT,
+            status TEXT DEFAULT 'pending',
+            entry TEXT NOT NULL  -- JSON object as stored in the inbox file
+        );
+        CREATE INDEX IF NOT EXISTS idx_trace_path ON trace_inbox(path, status);
+        CREATE INDEX IF NOT EXISTS idx_trace_status ON trace_inbox(status);
+        CREATE TABLE IF NOT EXISTS cache_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
     """)
     conn.commit()
+    # Bring caches written by older versions (or created by the daemon) up to date.
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(tandas)")}
+    if "short_id" not in columns:
+        conn.execute("ALTER TABLE tandas ADD COLUMN short_id TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_short_id ON tandas(short_id)")
+    _rebuild_derived(conn)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def _rebuild_derived(conn: sqlite3.Connection):
+    """Recompute tanda_covers, short_id and flakiness_score for every cached tanda."""
+    with conn:
+        conn.execute("BEGIN")
+        conn.execute("DELETE FROM tanda_covers")
+        conn.execute("""
+            INSERT OR IGNORE INTO tanda_covers (tanda_id, cover)
+            SELECT tandas.id, json_each.value
+            FROM tandas, json_each(tandas.covers)
+            WHERE json_valid(tandas.covers)
+        """)
+        conn.execute("""
+            UPDATE tandas SET short_id = substr(id, -:short_len)
+        """, {"short_len": SHORT_ID_LEN})
+        conn.execute("""
+            UPDATE tandas SET
+                flakiness_score = COALESCE((
+                    SELECT ROUND(AVG(json_extract(r.value, '$.result') = 'fail'), 2)
+                    FROM json_each(tandas.run_history) r
+                    WHERE r.key >= json_array_length(tandas.run_history) - :window
+                ), 0.0)
+            WHERE json_valid(run_history)
+        """, {"window": FLAKINESS_WINDOW})
+
+
+# One cache connection per process, keyed by the database's absolute path.
+_DB = {"path": None, "conn": None}
+
+
+def _close_db():
+    if _DB["conn"] is not None:
+        _DB["conn"].close()
+        _DB.update(path=None, conn=None)
 
 
 def get_db() -> sqlite3.Connection:
-    """Get database connection, initializing if needed."""
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    init_db(conn)
-    return conn
+    """Get the shared database connection, initializing it on first use."""
+    path = os.path.abspath(DB_FILE)
+    if _DB["conn"] is None or _DB["path"] != path:
+        _close_db()
+        # Autocommit mode: writers open explicit transactions (see sync_to_sqlite).
+        conn = sqlite3.connect(path, cached_statements=256, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        init_db(conn)
+        _DB.update(path=path, conn=conn)
+    return _DB["conn"]
+
+
+atexit.register(_close_db)
 
 
 def ensure_initialized():
@@ -104,73 +201,240 @@ def ensure_initialized():
         sys.exit(1)
 
 
+# Parsed issues.jsonl, reused while the file is unchanged on disk. "lines"
+# counts the records in the file, superseded ones included; "skipped" counts
+# lines that did not parse.
+_JSONL_CACHE = {"key": None, "data": None, "lines": 0, "skipped": 0}
+
+
+def _stat_key(path: Path) -> Optional[tuple]:
+    """Return (mtime_ns, size, inode) for path, or None if missing.
+
+    The inode catches a file replaced by rename (see _write_file_atomic)
+    within the same mtime tick and with the same size.
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def _jsonl_key() -> Optional[tuple]:
+    """Return (absolute path, *_stat_key) for the registry, or None if missing."""
+    stat_key = _stat_key(ISSUES_FILE)
+    if stat_key is None:
+        return None
+    return (os.path.abspath(ISSUES_FILE), *stat_key)
+
+
 def load_all_from_jsonl() -> dict:
     """Load all tandas from JSONL file (source of truth)."""
+    key = _jsonl_key()
+    if key is not None and key == _JSONL_CACHE["key"]:
+        return _JSONL_CACHE["data"]
+
+    # Updates are appended, so a tanda may appear on several lines; the last wins.
     tandas = {}
-    if ISSUES_FILE.exists():
-        with open(ISSUES_FILE) as f:
-            for line in f:
-                line = line.strip()
-                if line:
-                    data = json.loads(line)
-                    tandas[data["id"]] = data
+    lines = skipped = 0
+    if key is not None:
+        with open(ISSUES_FILE, "rb") as f:
+            records = [line for line in f.read().split(b"\n") if line.strip()]
+        # Bytes go straight to the parser, which tolerates surrounding whitespace.
+        try:
+            tandas = {data["id"]: data for data in map(loads, records)}
+            lines = len(records)
+        except JSONDecodeError:
+            tandas, lines = _load_jsonl_lenient(records)
+            skipped = len(records) - lines
+
+    _JSONL_CACHE.update(key=key, data=tandas, lines=lines, skipped=skipped)
     return tandas
 
 
+def _load_jsonl_lenient(records: list) -> tuple:
+    """Parse JSONL lines one at a time, skipping malformed ones."""
+    tandas = {}
+    lines = 0
+    for line in records:
+        try:
+            data = loads(line)
+        except JSONDecodeError:
+            continue
+        tandas[data["id"]] = data
+        lines += 1
+    return tandas, lines
+
+
+def _write_file_atomic(path, data: bytes, expected_key: Optional[tuple] = None) -> bool:
+    """Replace path with data using one write, an fsync and a rename.
+
+    Readers (and the daemon's watcher) see either the old or the new file,
+    never a truncated one, as with the daemon's own JSONL export. With
+    expected_key, the file is left alone (and False returned) if its
+    _stat_key no longer matches, e.g. because another process appended.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    if expected_key is not None and _stat_key(Path(path)) != expected_key:
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, path)
+    return True
+
+
 def append_to_jsonl(tanda: dict):
-    """Append a tanda record to JSONL file."""
-    with open(ISSUES_FILE, "a") as f:
-        f.write(json.dumps(tanda) + "\n")
+    """Append a tanda record to JSONL file (new tandas and updates alike)."""
+    append_many_to_jsonl([tanda])
+
+
+def append_many_to_jsonl(records: list):
+    """Append tanda records to the JSONL file with a single write and fsync."""
+    fresh = _JSONL_CACHE["data"] is not None and _JSONL_CACHE["key"] == _jsonl_key()
+    with open(ISSUES_FILE, "ab") as f:
+        f.write(b"".join(dumps(tanda) + b"\n" for tanda in records))
+        f.flush()
+        os.fsync(f.fileno())
+        # Take the new stat key from the open descriptor rather than the path.
+        stat = os.fstat(f.fileno())
+    if fresh:
+        _JSONL_CACHE["data"].update((tanda["id"], tanda) for tanda in records)
+        _JSONL_CACHE["key"] = (_JSONL_CACHE["key"][0], stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        _JSONL_CACHE["lines"] += len(records)
+        _maybe_compact()
+    else:
+        _JSONL_CACHE["key"] = None
+
 
+def _maybe_compact():
+    """Compact the cached registry's file once it is mostly superseded records."""
+    if _JSONL_CACHE["lines"] > COMPACT_RATIO * len(_JSONL_CACHE["data"]):
+        compact_jsonl()
 
-def rewrite_jsonl(tandas: dict):
-    """Rewrite entire JSONL file (for updates)."""
-    with open(ISSUES_FILE, "w") as f:
-        for tanda in tandas.values():
-            f.write(json.dumps(tanda) + "\n")
+
+def compact_jsonl() -> int:
+    """Rewrite the JSONL file with one line per tanda; return lines dropped.
+
+    Only write paths call this. Nothing is written while the file has lines
+    that do not parse (they would be lost) or if it changes underneath us.
+    """
+    tandas = load_all_from_jsonl()
+    dropped = _JSONL_CACHE["lines"] - len(tandas)
+    if not dropped or _JSONL_CACHE["skipped"]:
+        return 0
+    if not rewrite_jsonl(tandas, expected_key=_JSONL_CACHE["key"][1:]):
+        return 0
+    return dropped
+
+
+def rewrite_jsonl(tandas: dict, expected_key: Optional[tuple] = None) -> bool:
+    """Replace the JSONL file with one line per tanda; see _write_file_atomic."""
+    data = b"".join(dumps(tanda) + b"\n" for tanda in tandas.values())
+    if not _write_file_atomic(ISSUES_FILE, data, expected_key):
+        return False
+    _JSONL_CACHE.update(key=_jsonl_key(), data=tandas, lines=len(tandas), skipped=0)
+    return True
 
 
 def calculate_flakiness(run_history: list) -> float:
     """Calculate flakiness score from run history (0.0 to 1.0)."""
     if not run_history:
         return 0.0
-    # Only consider recent runs (last 10)
-    recent = run_history[-10:]
+    # Only consider recent runs
+    recent = run_history[-FLAKINESS_WINDOW:]
     failures = sum(1 for r in recent if r.get("result") == "fail")
     return round(failures / len(recent), 2)
 
 
+def _tanda_row(t: dict) -> tuple:
+    """Flatten a tanda record into a row for the SQLite cache."""
+    run_history = t.get("run_history", [])
+    last_run = run_history[-1] if run_history else {}
+    return (
+        t["id"],
+        t["id"][-SHORT_ID_LEN:],
+        t["title"],
+        t.get("status", "active"),
+        t.get("file"),
+        dumps_text(t.get("covers", [])),
+        dumps_text(t.get("depends_on", [])),
+        dumps_text(t.get("notes", [])) if isinstance(t.get("notes"), list) else t.get("notes", ""),
+        dumps_text(run_history),
+        last_run.get("ts"),
+        last_run.get("result"),
+        t.get("created_at"),
+        t.get("updated_at"),
+        calculate_flakiness(run_history),
+    )
+
+
+_CACHE_COLUMNS = (
+    "id, short_id, title, status, file, covers, depends_on, notes, run_history, "
+    "last_run_at, last_run_result, created_at, updated_at, flakiness_score"
+)
+
+
+def _upsert_rows(conn: sqlite3.Connection, rows: list, tandas: dict):
+    """Write cache rows (see _tanda_row) and their covers; runs inside the caller's transaction."""
+    changed_ids = [(row[0],) for row in rows]
+    conn.executemany("DELETE FROM tanda_covers WHERE tanda_id = ?", changed_ids)
+    conn.executemany(f"""
+        INSERT INTO tandas ({_CACHE_COLUMNS})
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            short_id = excluded.short_id,
+            title = excluded.title,
+            status = excluded.status,
+            file = excluded.file,
+            covers = excluded.covers,
+            depends_on = excluded.depends_on,
+            notes = excluded.notes,
+            run_history = excluded.run_history,
+            last_run_at = excluded.last_run_at,
+            last_run_result = excluded.last_run_result,
+            created_at = excluded.created_at,
+            updated_at = excluded.updated_at,
+            flakiness_score = excluded.flakiness_score
+    """, rows)
+    conn.executemany(
+        "INSERT OR IGNORE INTO tanda_covers (tanda_id, cover) VALUES (?, ?)",
+        [(tid, cover) for (tid,) in changed_ids for cover in tandas[tid].get("covers") or []],
+    )
+
+
+def _store_issues_key(conn: sqlite3.Connection):
+    conn.execute(
+        "INSERT OR REPLACE INTO cache_meta (key, value) VALUES ('issues', ?)",
+        (repr(_stat_key(ISSUES_FILE)),),
+    )
+
+
 def sync_to_sqlite(tandas: dict):
-    """Sync all tandas to SQLite cache."""
+    """Sync all tandas to SQLite cache, writing only rows that changed."""
+    rows = [_tanda_row(t) for t in tandas.values()]
     conn = get_db()
-    conn.execute("DELETE FROM tandas")
-    for t in tandas.values():
-        run_history = t.get("run_history", [])
-        flakiness = calculate_flakiness(run_history)
-        last_run = run_history[-1] if run_history else {}
+    with conn:
+        conn.execute("BEGIN")
+        cached = {row[0]: tuple(row) for row in conn.execute(f"SELECT {_CACHE_COLUMNS} FROM tandas")}
+        stale = [(tid,) for tid in cached.keys() - tandas.keys()]
+        conn.executemany("DELETE FROM tandas WHERE id = ?", stale)
+        conn.executemany("DELETE FROM tanda_covers WHERE tanda_id = ?", stale)
+        _upsert_rows(conn, [row for row in rows if cached.get(row[0]) != row], tandas)
 
-        conn.execute("""
-            INSERT INTO tandas (id, title, status, file, covers, depends_on, notes,
-                               run_history, flakiness_score, last_run_at, last_run_result,
-                               created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            t["id"],
-            t["title"],
-            t.get("status", "active"),
-            t.get("file"),
-            json.dumps(t.get("covers", [])),
-            json.dumps(t.get("depends_on", [])),
-            json.dumps(t.get("notes", [])) if isinstance(t.get("notes"), list) else t.get("notes", ""),
-            json.dumps(run_history),
-            flakiness,
-            last_run.get("ts"),
-            last_run.get("result"),
-            t.get("created_at"),
-            t.get("updated_at"),
-        ))
-    conn.commit()
-    conn.close()
+
+def upsert_tanda(conn: sqlite3.Connection, tanda: dict):
+    """Write one just-appended tanda to a cache that was current before the append.
+
+    Single-record mutations use this instead of sync_cache_from_json, so the
+    cache does one upsert rather than diffing every row.
+    """
+    with conn:
+        conn.execute("BEGIN")
+        _upsert_rows(conn, [_tanda_row(tanda)], {tanda["id"]: tanda})
+        _store_issues_key(conn)
 
 
 def daemon_call(method: str, params: Optional[dict] = None, timeout: float = 2.0, quiet: bool = True):
@@ -178,7 +442,9 @@ def daemon_call(method: str, params: Optional[dict] = None, timeout: float = 2.0
     if not DAEMON_SOCKET.exists():
         return None
 
-    payload = ""
+    import socket
+
+    payload = bytearray()
     try:
         with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
             sock.settimeout(timeout)
@@ -188,14 +454,18 @@ def daemon_call(method: str, params: Optional[dict] = None, timeout: float = 2.0
                 "params": params or {},
                 "id": int(time.time() * 1000),
             }
-            sock.sendall((json.dumps(request) + "\n").encode())
-            with sock.makefile("r") as response:
-                payload = response.readline()
+            sock.sendall(dumps(request) + b"\n")
+            # Responses are newline-delimited; the daemon keeps the connection open.
+            while not payload.endswith(b"\n"):
+                chunk = sock.recv(4096)
+                if not chunk:
+                    break
+                payload += chunk
     except (FileNotFoundError, ConnectionRefusedError, socket.timeout, OSError) as exc:
         if not quiet:
             print(f"{YELLOW}Daemon communication failed: {exc}{RESET}")
         return None
-    except json.JSONDecodeError:
+    except JSONDecodeError:
         if not quiet:
             print(f"{YELLOW}Daemon sent invalid JSON response.{RESET}")
         return None
@@ -204,8 +474,8 @@ def daemon_call(method: str, params: Optional[dict] = None, timeout: float = 2.0
         return None
 
     try:
-        data = json.loads(payload)
-    except json.JSONDecodeError:
+        data = loads(payload)
+    except JSONDecodeError:
         if not quiet:
             print(f"{YELLOW}Daemon response parse error.{RESET}")
         return None
@@ -233,27 +503,31 @@ def wait_for_daemon(timeout: float = 5.0) -> bool:
     return False
 
 
-def resolve_daemon_binary(explicit: Optional[str] = None) -> Optional[str]:
-    """Locate the td-daemon binary, honoring overrides via args or env."""
-
-    def _resolve(candidate: Optional[str]) -> Optional[str]:
-        if not candidate:
-            return None
-        expanded = os.path.expanduser(candidate)
-        path_obj = Path(expanded)
-        if path_obj.exists() and path_obj.is_file():
-            return str(path_obj)
-        found = shutil.which(expanded)
-        if found:
-            return found
+@functools.lru_cache(maxsize=32)
+def _resolve_binary(candidate: Optional[str]) -> Optional[str]:
+    """Resolve a binary path or PATH lookup; cached for the life of the process."""
+    if not candidate:
         return None
+    expanded = os.path.expanduser(candidate)
+    path_obj = Path(expanded)
+    if path_obj.exists() and path_obj.is_file():
+        return str(path_obj)
+    import shutil
+
+    found = shutil.which(expanded)
+    if found:
+        return found
+    return None
+
 
+def resolve_daemon_binary(explicit: Optional[str] = None) -> Optional[str]:
+    """Locate the td-daemon binary, honoring overrides via args or env."""
     for option in (explicit, os.environ.get(DAEMON_BIN_ENV)):
-        resolved = _resolve(option)
+        resolved = _resolve_binary(option)
         if resolved:
             return resolved
 
-    resolved_default = _resolve(DEFAULT_DAEMON_BIN)
+    resolved_default = _resolve_binary(DEFAULT_DAEMON_BIN)
     if resolved_default:
         return resolved_default
 
@@ -269,12 +543,83 @@ def sync_cache_from_json(tandas: Optional[dict] = None) -> dict:
     if tandas is None:
         tandas = load_all_from_jsonl()
 
-    if not daemon_call("import"):
+    if daemon_call("import"):
+        # The daemon writes only the JSON columns and its own flakiness score.
+        _rebuild_derived(get_db())
+    else:
         sync_to_sqlite(tandas)
+    _store_issues_key(get_db())
 
     return tandas
 
 
+def tandas_db() -> sqlite3.Connection:
+    """Return the cache connection, resyncing it first if issues.jsonl changed."""
+    conn = get_db()
+    row = conn.execute("SELECT value FROM cache_meta WHERE key = 'issues'").fetchone()
+    if row is None or row[0] != repr(_stat_key(ISSUES_FILE)):
+        sync_cache_from_json()
+    return conn
+
+
+def row_to_tanda(row: sqlite3.Row) -> dict:
+    """Rebuild a tanda record from its cached SQLite row."""
+    notes = row["notes"] or ""
+    if notes.startswith("["):
+        try:
+            notes = loads(notes)
+        except JSONDecodeError:
+            pass  # A legacy plain-text note that happens to start with "["
+    tanda = {
+        "id": row["id"],
+        "title": row["title"],
+        "status": row["status"],
+        "file": row["file"],
+        "covers": loads(row["covers"] or "[]"),
+        "depends_on": loads(row["depends_on"] or "[]"),
+        "notes": notes,
+        "run_history": loads(row["run_history"] or "[]"),
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+    }
+    # Fields missing from the JSONL record come back as NULL; leave them out.
+    return {key: value for key, value in tanda.items() if value is not None}
+
+
+def _find_row(conn: sqlite3.Connection, id_or_partial: str, columns: str = "*") -> Optional[sqlite3.Row]:
+    """Look up a cached tanda by full ID, unique ID prefix, or ID suffix."""
+    # Full IDs, their hash part and prefixes ("td-ab12") hit an index; other
+    # suffixes scan.
+    row = conn.execute(
+        f"SELECT {columns} FROM tandas WHERE id = ? OR short_id = ? LIMIT 1",
+        (id_or_partial, id_or_partial),
+    ).fetchone()
+    if row is None and id_or_partial:
+        # Range scan over the primary key; ambiguous prefixes do not resolve.
+        upper = id_or_partial[:-1] + chr(ord(id_or_partial[-1]) + 1)
+        rows = conn.execute(
+            f"SELECT {columns} FROM tandas WHERE id >= ? AND id < ? LIMIT 2",
+            (id_or_partial, upper),
+        ).fetchall()
+        if len(rows) == 1:
+            return rows[0]
+    # Also for SHORT_ID_LEN: the daemon's watcher re-imports rows without short_id.
+    if row is None and id_or_partial:
+        row = conn.execute(
+            f"SELECT {columns} FROM tandas WHERE substr(id, -?) = ? ORDER BY rowid LIMIT 1",
+            (len(id_or_partial), id_or_partial),
+        ).fetchone()
+    return row
+
+
+def find_tanda_sql(conn: sqlite3.Connection, id_or_partial: str) -> tuple:
+    """Find a tanda by full or partial (suffix) ID in the cache. Returns (id, tanda) or (None, None)."""
+    row = _find_row(conn, id_or_partial)
+    if row is None:
+        return None, None
+    return row["id"], row_to_tanda(row)
+
+
 def write_template(path: Path, content: str, *, force: bool = False) -> bool:
     """Write template content if file missing or force requested."""
     if path.exists() and not force:
@@ -314,56 +659,168 @@ def normalize_trace_path(path: str) -> str:
         return str(candidate)
 
 
-def load_trace_inbox() -> list:
+def _read_trace_inbox_file() -> list:
     entries = []
     if TRACE_INBOX_FILE.exists():
-        with open(TRACE_INBOX_FILE) as fh:
+        with open(TRACE_INBOX_FILE, "rb") as fh:
             for line in fh:
-                line = line.strip()
-                if not line:
+                if line.isspace():
                     continue
                 try:
-                    entries.append(json.loads(line))
-                except json.JSONDecodeError:
+                    entries.append(loads(line))
+                except JSONDecodeError:
                     continue
     return entries
 
 
+def _store_trace_inbox_key(conn: sqlite3.Connection, stat_key: Optional[tuple] = None):
+    if stat_key is None:
+        stat_key = _stat_key(TRACE_INBOX_FILE)
+    conn.execute(
+        "INSERT OR REPLACE INTO cache_meta (key, value) VALUES ('trace_inbox', ?)",
+        (repr(stat_key),),
+    )
+
+
+def trace_inbox_db() -> sqlite3.Connection:
+    """Return a connection whose trace_inbox table mirrors trace_inbox.jsonl.
+
+    The JSONL file stays the source of truth (the daemon appends to it); the
+    table is reloaded only when the file's stat key (see _stat_key) changes.
+    """
+    conn = get_db()
+    row = conn.execute("SELECT value FROM cache_meta WHERE key = 'trace_inbox'").fetchone()
+    if row is None or row[0] != repr(_stat_key(TRACE_INBOX_FILE)):
+        entries = _read_trace_inbox_file()
+        with conn:
+            conn.execute("BEGIN")
+            conn.execute("DELETE FROM trace_inbox")
+            conn.executemany(
+                "INSERT INTO trace_inbox (seq, path, status, entry) VALUES (?, ?, ?, ?)",
+                [
+                    (seq, entry.get("path"), entry.get("status", "pending"), dumps_text(entry))
+                    for seq, entry in enumerate(entries)
+                ],
+            )
+            _store_trace_inbox_key(conn)
+    return conn
+
+
+def load_trace_inbox(status: Optional[str] = None) -> list:
+    conn = trace_inbox_db()
+    if status:
+        rows = conn.execute("SELECT entry FROM trace_inbox WHERE status = ? ORDER BY seq", (status,))
+    else:
+        rows = conn.execute("SELECT entry FROM trace_inbox ORDER BY seq")
+    entries = [loads(row[0]) for row in rows]
+    return entries
+
+
+def trace_inbox_paths() -> set:
+    conn = trace_inbox_db()
+    paths = {row[0] for row in conn.execute("SELECT DISTINCT path FROM trace_inbox")}
+    return paths
+
+
 def write_trace_inbox(entries: list):
     TRACE_INBOX_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(TRACE_INBOX_FILE, "w") as fh:
-        for entry in entries:
-            fh.write(json.dumps(entry) + "\n")
+    _write_file_atomic(TRACE_INBOX_FILE, b"".join(dumps(entry) + b"\n" for entry in entries))
 
 
 def append_trace_inbox_entry(entry: dict):
+    append_trace_inbox_entries([entry])
+
+
+def append_trace_inbox_entries(entries: list):
+    """Append inbox entries with a single write and mirror them in one transaction."""
     TRACE_INBOX_FILE.parent.mkdir(parents=True, exist_ok=True)
-    entry.setdefault("status", "pending")
-    with open(TRACE_INBOX_FILE, "a") as fh:
-        fh.write(json.dumps(entry) + "\n")
+    for entry in entries:
+        entry.setdefault("status", "pending")
+    conn = trace_inbox_db()
+    loaded_key = conn.execute("SELECT value FROM cache_meta WHERE key = 'trace_inbox'").fetchone()[0]
+    data = b"".join(dumps(entry) + b"\n" for entry in entries)
+    with open(TRACE_INBOX_FILE, "ab") as fh:
+        before = os.fstat(fh.fileno())
+        fh.write(data)
+        fh.flush()
+        after = os.fstat(fh.fileno())
+
+    # Mirror the entries only if the file held exactly what the table was loaded
+    # from plus our bytes; if the daemon appended in between, reload on next use.
+    before_key = (before.st_mtime_ns, before.st_size, before.st_ino)
+    # A file missing at load time (key None) was just created empty by open().
+    unchanged = loaded_key == repr(before_key) or (loaded_key == repr(None) and not before.st_size)
+    in_step = unchanged and after.st_size == before.st_size + len(data)
+    with conn:
+        conn.execute("BEGIN")
+        if not in_step:
+            conn.execute("DELETE FROM cache_meta WHERE key = 'trace_inbox'")
+            return
+        conn.executemany(
+            "INSERT INTO trace_inbox (seq, path, status, entry) "
+            "VALUES ((SELECT COALESCE(MAX(seq), -1) + 1 FROM trace_inbox), ?, ?, ?)",
+            [(entry.get("path"), entry["status"], dumps_text(entry)) for entry in entries],
+        )
+        _store_trace_inbox_key(conn, (after.st_mtime_ns, after.st_size, after.st_ino))
 
 
 def update_trace_entry(path: str, **updates) -> bool:
     path = normalize_trace_path(path)
-    entries = load_trace_inbox()
-    updated = False
-    for entry in entries:
-        if entry.get("path") == path and entry.get("status", "pending") == "pending":
+    conn = trace_inbox_db()
+    pending = conn.execute(
+        "SELECT seq, entry FROM trace_inbox WHERE path = ? AND status = 'pending'", (path,)
+    ).fetchall()
+    if not pending:
+        return False
+
+    with conn:
+        conn.execute("BEGIN")
+        for seq, raw in pending:
+            entry = loads(raw)
             entry.update(updates)
-            updated = True
-    if updated:
-        write_trace_inbox(entries)
-    return updated
+            conn.execute(
+                "UPDATE trace_inbox SET status = ?, entry = ? WHERE seq = ?",
+                (entry.get("status", "pending"), dumps_text(entry), seq),
+            )
+        # Keep the JSONL inbox, which the daemon appends to, in step with the table.
+        write_trace_inbox([loads(row[0]) for row in conn.execute("SELECT entry FROM trace_inbox ORDER BY seq")])
+        _store_trace_inbox_key(conn)
+    return True
+
+
+_STATUS_COLORED = {
+    status: f"{color}{status}{RESET}"
+    for status, color in (("active", GREEN), ("flaky", YELLOW), ("deprecated", RED))
+}
+
+
+def git_stage_registry() -> bool:
+    """`git add` the registry directory in a git checkout; True if anything was staged."""
+    if not Path(".git").exists():
+        return False
+    import subprocess
+
+    # Closing the cache checkpoints the WAL into db.sqlite; the side files are
+    # excluded anyway in case another process (the daemon) still holds them.
+    _close_db()
+    excludes = [f":(exclude){TANDA_DIR / name}" for name in LOCAL_ONLY_FILES]
+    try:
+        # --verbose lists what was staged, so no separate `git status` is needed.
+        result = subprocess.run(
+            ["git", "add", "--verbose", str(TANDA_DIR), *excludes],
+            capture_output=True,
+            text=True,
+        )
+    except OSError:
+        # No git binary; the registry still works without staging.
+        return False
+    return bool(result.stdout.strip())
 
 
 def status_color(status: str) -> str:
     """Return colored status string."""
-    colors = {
-        "active": GREEN,
-        "flaky": YELLOW,
-        "deprecated": RED,
-    }
-    return f"{colors.get(status, '')}{status}{RESET}"
+    colored = _STATUS_COLORED.get(status)
+    return colored if colored is not None else f"{status}{RESET}"
 
 
 # =============================================================================
@@ -380,12 +837,10 @@ def cmd_init(args):
     ISSUES_FILE.touch()
 
     # Initialize SQLite
-    conn = get_db()
-    conn.close()
+    get_db()
 
     # Add to git if in a repo
-    if Path(".git").exists():
-        subprocess.run(["git", "add", str(TANDA_DIR)], capture_output=True)
+    git_stage_registry()
 
     print(f"{GREEN}Tandas initialized in {TANDA_DIR}/{RESET}")
     print(f"  Registry: {ISSUES_FILE}")
@@ -418,11 +873,10 @@ def cmd_create(args):
         "updated_at": now,
     }
 
-    append_to_jsonl(tanda)
-
     # Update SQLite cache
-    tandas = load_all_from_jsonl()
-    sync_cache_from_json(tandas)
+    conn = tandas_db()
+    append_to_jsonl(tanda)
+    upsert_tanda(conn, tanda)
 
     print(f"{GREEN}Created tanda {BOLD}{tanda_id}{RESET}")
     print(f"  Title:  {tanda['title']}")
@@ -433,16 +887,41 @@ def cmd_create(args):
         print(f"  Covers: {', '.join(covers)}")
 
 
+# `td list` prints only these, so the JSON history/notes columns are never read.
+_LIST_COLUMNS = "id, title, status, file"
+
+
+@functools.lru_cache(maxsize=16)
+def _covers_query(tag_count: int, match_all: bool = False) -> str:
+    """Base `td list --covers` query matching any (or all) of tag_count tags.
+
+    The text depends only on its arguments, so repeated filters reuse one
+    statement from the connection's statement cache.
+    """
+    placeholders = ", ".join("?" * tag_count)
+    having = f" GROUP BY tanda_id HAVING COUNT(*) = {tag_count}" if match_all else ""
+    return (
+        f"SELECT {_LIST_COLUMNS} FROM tandas WHERE id IN "
+        f"(SELECT tanda_id FROM tanda_covers WHERE cover IN ({placeholders}){having})"
+    )
+
+
 def cmd_list(args):
     """List tandas with optional filtering."""
     ensure_initialized()
 
-    conn = get_db()
+    conn = tandas_db()
 
     # Build query based on filters
-    query = "SELECT * FROM tandas WHERE 1=1"
+    query = f"SELECT {_LIST_COLUMNS} FROM tandas WHERE 1=1"
     params = []
 
+    if args.covers:
+        # Deduplicated so an "all" match can compare the hit count with len(tags).
+        tags = list(dict.fromkeys(c.strip() for c in args.covers.split(",") if c.strip()))
+        query = _covers_query(len(tags), args.all_covers)
+        params.extend(tags)
+
     if args.active:
         query += " AND status = 'active'"
     elif args.flaky:
@@ -453,14 +932,9 @@ def cmd_list(args):
         query += " AND status = ?"
         params.append(args.status)
 
-    if args.covers:
-        query += " AND covers LIKE ?"
-        params.append(f'%"{args.covers}"%')
-
     query += " ORDER BY updated_at DESC"
 
     rows = conn.execute(query, params).fetchall()
-    conn.close()
 
     if not rows:
         print(f"{YELLOW}No tandas found.{RESET}")
@@ -468,72 +942,82 @@ def cmd_list(args):
             print("Run 'td discover' to import existing tests.")
         return
 
-    print(f"{BOLD}{'ID':<14} {'Status':<12} {'Title':<30} {'File'}{RESET}")
-    print("-" * 80)
+    lines = []
+    lines.append(f"{BOLD}{'ID':<14} {'Status':<12} {'Title':<30} {'File'}{RESET}")
+    lines.append("-" * 80)
 
     for row in rows:
         status_str = status_color(row["status"])
         title = row["title"][:28] + ".." if len(row["title"]) > 30 else row["title"]
         file_str = row["file"] or ""
-        print(f"{row['id']:<14} {status_str:<21} {title:<30} {file_str}")
+        lines.append(f"{row['id']:<14} {status_str:<21} {title:<30} {file_str}")
 
-    print(f"\n{len(rows)} tanda(s)")
+    lines.append(f"\n{len(rows)} tanda(s)")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
-def cmd_show(args):
-    """Show detailed view of a single tanda."""
-    ensure_initialized()
+def cmd_show(args, tandas: Optional[dict] = None):
+    """Show detailed view of a single tanda.
 
-    tandas = load_all_from_jsonl()
+    Callers that already hold the loaded registry (cmd_update) pass it as
+    "tandas" so the record is not read back from the cache.
+    """
+    ensure_initialized()
 
-    # Find by ID or partial match
-    tanda = None
-    for tid, t in tandas.items():
-        if tid == args.id or tid.endswith(args.id):
-            tanda = t
-            break
+    if tandas is None:
+        conn = tandas_db()
+        tanda_id, tanda = find_tanda_sql(conn, args.id)
+    else:
+        conn = None
+        tanda_id, tanda = find_tanda(tandas, args.id)
 
     if not tanda:
         print(f"{RED}Tandas '{args.id}' not found.{RESET}")
         sys.exit(1)
 
-    print(f"{BOLD}{tanda['id']}{RESET}")
-    print(f"  Title:      {tanda['title']}")
-    print(f"  Status:     {status_color(tanda['status'])}")
-    print(f"  File:       {tanda.get('file') or '(none)'}")
-    print(f"  Covers:     {', '.join(tanda.get('covers', [])) or '(none)'}")
-    print(f"  Depends on: {', '.join(tanda.get('depends_on', [])) or '(none)'}")
-    print(f"  Created:    {tanda.get('created_at', 'unknown')}")
-    print(f"  Updated:    {tanda.get('updated_at', 'unknown')}")
+    lines = []
+    lines.append(f"{BOLD}{tanda['id']}{RESET}")
+    lines.append(f"  Title:      {tanda['title']}")
+    lines.append(f"  Status:     {status_color(tanda['status'])}")
+    lines.append(f"  File:       {tanda.get('file') or '(none)'}")
+    lines.append(f"  Covers:     {', '.join(tanda.get('covers', [])) or '(none)'}")
+    lines.append(f"  Depends on: {', '.join(tanda.get('depends_on', [])) or '(none)'}")
+    lines.append(f"  Created:    {tanda.get('created_at', 'unknown')}")
+    lines.append(f"  Updated:    {tanda.get('updated_at', 'unknown')}")
 
     # Display run history summary
     run_history = tanda.get("run_history", [])
     if run_history:
-        flakiness = calculate_flakiness(run_history)
+        if conn is None:
+            flakiness = calculate_flakiness(run_history)
+        else:
+            flakiness = conn.execute("SELECT flakiness_score FROM tandas WHERE id = ?", (tanda_id,)).fetchone()[0]
         last_run = run_history[-1]
         result_color = GREEN if last_run.get("result") == "pass" else RED if last_run.get("result") == "fail" else YELLOW
-        print(f"\n{BOLD}Run History:{RESET}")
-        print(f"  Total runs:  {len(run_history)}")
-        print(f"  Last result: {result_color}{last_run.get('result')}{RESET} ({last_run.get('ts', 'unknown')})")
+        lines.append(f"\n{BOLD}Run History:{RESET}")
+        lines.append(f"  Total runs:  {len(run_history)}")
+        lines.append(f"  Last result: {result_color}{last_run.get('result')}{RESET} ({last_run.get('ts', 'unknown')})")
         if last_run.get("duration"):
-            print(f"  Duration:    {last_run['duration']}")
+            lines.append(f"  Duration:    {last_run['duration']}")
         if flakiness > 0:
-            print(f"  Flakiness:   {YELLOW}{flakiness * 100:.0f}%{RESET}")
+            lines.append(f"  Flakiness:   {YELLOW}{flakiness * 100:.0f}%{RESET}")
         if last_run.get("trace"):
-            print(f"  Trace:       {last_run['trace']}")
+            lines.append(f"  Trace:       {last_run['trace']}")
 
     # Display notes
     notes = tanda.get("notes", [])
     if notes:
-        print(f"\n{BOLD}Notes:{RESET}")
+        lines.append(f"\n{BOLD}Notes:{RESET}")
         # Handle both old string format and new array format
         if isinstance(notes, str):
-            print(f"  {notes.replace(chr(10), chr(10) + '  ')}")
+            lines.append(f"  {notes.replace(chr(10), chr(10) + '  ')}")
         else:
             for note in notes[-5:]:  # Show last 5 notes
                 ts = note.get("ts", "")[:10]  # Date only
                 text = note.get("text", str(note))
-                print(f"  [{ts}] {text}")
+                lines.append(f"  [{ts}] {text}")
+
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def cmd_update(args):
@@ -541,23 +1025,17 @@ def cmd_update(args):
     ensure_initialized()
 
     tandas = load_all_from_jsonl()
+    conn = tandas_db()
 
-    # Find tanda
-    tanda_id = None
-    for tid in tandas:
-        if tid == args.id or tid.endswith(args.id):
-            tanda_id = tid
-            break
-
-    if not tanda_id:
+    tanda_id, tanda = find_tanda(tandas, args.id)
+    if not tanda:
         print(f"{RED}Tandas '{args.id}' not found.{RESET}")
         sys.exit(1)
 
-    tanda = tandas[tanda_id]
     updated = False
 
     if args.status:
-        if args.status not in ("active", "flaky", "deprecated"):
+        if args.status not in _STATUSES:
             print(f"{RED}Invalid status. Use: active, flaky, deprecated{RESET}")
             sys.exit(1)
         tanda["status"] = args.status
@@ -587,7 +1065,7 @@ def cmd_update(args):
         run_history.append(run_entry)
         tanda["run_history"] = run_history
 
-        # Auto-update status based on flakiness
+        # Auto-update status based on flakiness (only the last FLAKINESS_WINDOW runs count)
         flakiness = calculate_flakiness(run_history)
         if flakiness >= 0.2 and tanda.get("status") == "active":
             tanda["status"] = "flaky"
@@ -622,41 +1100,38 @@ def cmd_update(args):
             updated = True
 
     if updated:
+        import argparse
+
         tanda["updated_at"] = now_iso()
-        tandas[tanda_id] = tanda
-        rewrite_jsonl(tandas)
-        sync_cache_from_json(tandas)
+        append_to_jsonl(tanda)
+        upsert_tanda(conn, tanda)
         print(f"{GREEN}Updated {tanda_id}{RESET}")
-        cmd_show(argparse.Namespace(id=tanda_id))
+        cmd_show(argparse.Namespace(id=tanda_id), tandas)
     else:
         print("No updates specified. Use --status, --note, --file, --covers, --add-dep, or --remove-dep")
 
 
 def find_tanda(tandas: dict, id_or_partial: str) -> tuple:
-    """Find a tanda by full or partial ID. Returns (id, tanda) or (None, None)."""
-    for tid, t in tandas.items():
-        if tid == id_or_partial or tid.endswith(id_or_partial):
-            return tid, t
-    return None, None
-
+    """Find a tanda by full or partial ID. Returns (id, tanda) or (None, None).
 
-def compute_blocked_by(tandas: dict, tanda_id: str) -> list:
-    """Compute which tandas are blocked by (depend on) this tanda."""
-    blocked_by = []
-    for tid, t in tandas.items():
-        if tanda_id in t.get("depends_on", []):
-            blocked_by.append(tid)
-    return blocked_by
+    Partial IDs are resolved through the cache's indexes rather than by
+    scanning every key of the loaded registry.
+    """
+    if id_or_partial in tandas:
+        return id_or_partial, tandas[id_or_partial]
+    row = _find_row(tandas_db(), id_or_partial, "id")
+    if row is None or row["id"] not in tandas:
+        return None, None
+    return row["id"], tandas[row["id"]]
 
 
 def cmd_dep(args):
     """Manage tanda dependencies."""
     ensure_initialized()
 
-    tandas = load_all_from_jsonl()
-
     if args.dep_command == "add":
         # Add dependency: A depends on B
+        tandas = load_all_from_jsonl()
         tanda_id, tanda = find_tanda(tandas, args.id)
         if not tanda:
             print(f"{RED}Tandas '{args.id}' not found.{RESET}")
@@ -679,14 +1154,15 @@ def cmd_dep(args):
         deps.append(dep_id)
         tanda["depends_on"] = deps
         tanda["updated_at"] = now_iso()
-        tandas[tanda_id] = tanda
-        rewrite_jsonl(tandas)
-        sync_cache_from_json(tandas)
+        conn = tandas_db()
+        append_to_jsonl(tanda)
+        upsert_tanda(conn, tanda)
 
         print(f"{GREEN}Added dependency: {tanda_id} → {dep_id}{RESET}")
         print(f"  {tanda['title']} now depends on {dep_tanda['title']}")
 
     elif args.dep_command == "remove":
+        tandas = load_all_from_jsonl()
         tanda_id, tanda = find_tanda(tandas, args.id)
         if not tanda:
             print(f"{RED}Tandas '{args.id}' not found.{RESET}")
@@ -705,20 +1181,35 @@ def cmd_dep(args):
         deps.remove(dep_id)
         tanda["depends_on"] = deps
         tanda["updated_at"] = now_iso()
-        tandas[tanda_id] = tanda
-        rewrite_jsonl(tandas)
-        sync_cache_from_json(tandas)
+        conn = tandas_db()
+        append_to_jsonl(tanda)
+        upsert_tanda(conn, tanda)
 
         print(f"{GREEN}Removed dependency: {tanda_id} → {dep_id}{RESET}")
 
     elif args.dep_command == "show":
-        tanda_id, tanda = find_tanda(tandas, args.id)
+        conn = tandas_db()
+        tanda_id, tanda = find_tanda_sql(conn, args.id)
         if not tanda:
             print(f"{RED}Tandas '{args.id}' not found.{RESET}")
             sys.exit(1)
 
         depends_on = tanda.get("depends_on", [])
-        blocked_by = compute_blocked_by(tandas, tanda_id)
+        dependencies = {
+            row["id"]: row
+            for row in conn.execute(
+                "SELECT id, title, status FROM tandas WHERE id IN (SELECT value FROM json_each(?))",
+                (dumps_text(depends_on),),
+            )
+        }
+        blockers = {
+            row["id"]: row
+            for row in conn.execute(
+                "SELECT id, title, status FROM tandas "
+                "WHERE EXISTS (SELECT 1 FROM json_each(tandas.depends_on) WHERE value = ?) ORDER BY rowid",
+                (tanda_id,),
+            )
+        }
 
         print(f"{BOLD}{tanda_id}: {tanda['title']}{RESET}")
         print(f"  Status: {status_color(tanda['status'])}")
@@ -726,7 +1217,7 @@ def cmd_dep(args):
         if depends_on:
             print(f"\n{BOLD}Depends on ({len(depends_on)}):{RESET}")
             for dep_id in depends_on:
-                dep_tanda = tandas.get(dep_id)
+                dep_tanda = dependencies.get(dep_id)
                 if dep_tanda:
                     status = status_color(dep_tanda['status'])
                     print(f"  → {dep_id}: {dep_tanda['title']} [{status}]")
@@ -735,13 +1226,11 @@ def cmd_dep(args):
         else:
             print(f"\n{BOLD}Depends on:{RESET} (none)")
 
-        if blocked_by:
-            print(f"\n{BOLD}Blocked by / Depended on by ({len(blocked_by)}):{RESET}")
-            for blocker_id in blocked_by:
-                blocker = tandas.get(blocker_id)
-                if blocker:
-                    status = status_color(blocker['status'])
-                    print(f"  ← {blocker_id}: {blocker['title']} [{status}]")
+        if blockers:
+            print(f"\n{BOLD}Blocked by / Depended on by ({len(blockers)}):{RESET}")
+            for blocker_id, blocker in blockers.items():
+                status = status_color(blocker['status'])
+                print(f"  ← {blocker_id}: {blocker['title']} [{status}]")
         else:
             print(f"\n{BOLD}Blocked by:{RESET} (none)")
 
@@ -753,29 +1242,26 @@ def cmd_discover(args):
     """Auto-discover and import Playwright test files."""
     ensure_initialized()
 
-    # Find test files
-    test_patterns = ["**/*.spec.ts", "**/*.spec.js", "**/*.test.ts", "**/*.test.js"]
-    test_files = []
-
     search_dir = Path(args.dir) if args.dir else Path(".")
 
-    for pattern in test_patterns:
-        test_files.extend(search_dir.glob(pattern))
-
-    # Filter out node_modules
-    test_files = [f for f in test_files if "node_modules" not in str(f)]
+    # Find test files in one walk, pruning node_modules and hidden directories
+    test_files = []
+    for dirpath, dirnames, filenames in os.walk(search_dir):
+        dirnames[:] = [d for d in dirnames if d != "node_modules" and not d.startswith(".")]
+        test_files.extend(Path(dirpath, name) for name in filenames if TEST_FILE_RE.search(name))
 
     if not test_files:
         print(f"{YELLOW}No test files found.{RESET}")
-        print(f"Searched for: {', '.join(test_patterns)}")
+        print(f"Searched for: {', '.join(TEST_FILE_PATTERNS)}")
         return
 
     # Load existing tandas to avoid duplicates
     tandas = load_all_from_jsonl()
     existing_files = {t.get("file") for t in tandas.values()}
 
-    created = 0
+    new_tandas = []
     skipped = 0
+    lines = []
 
     for test_file in sorted(test_files):
         file_str = str(test_file)
@@ -783,7 +1269,7 @@ def cmd_discover(args):
         if file_str in existing_files:
             skipped += 1
             if args.verbose:
-                print(f"  {YELLOW}Skip:{RESET} {file_str} (already registered)")
+                lines.append(f"  {YELLOW}Skip:{RESET} {file_str} (already registered)")
             continue
 
         # Generate title from filename
@@ -806,23 +1292,27 @@ def cmd_discover(args):
             "updated_at": now,
         }
 
-        append_to_jsonl(tanda)
-        created += 1
-        print(f"  {GREEN}Created:{RESET} {tanda_id} -> {file_str}")
+        new_tandas.append(tanda)
+        lines.append(f"  {GREEN}Created:{RESET} {tanda_id} -> {file_str}")
 
-    # Sync to SQLite
-    if created > 0:
-        tandas = load_all_from_jsonl()
+    created = len(new_tandas)
+    if new_tandas:
+        append_many_to_jsonl(new_tandas)
+        tandas.update((t["id"], t) for t in new_tandas)
         sync_cache_from_json(tandas)
 
-    print(f"\n{GREEN}Discovered {created} new test(s){RESET}", end="")
+    summary = f"\n{GREEN}Discovered {created} new test(s){RESET}"
     if skipped > 0:
-        print(f", {skipped} already registered", end="")
-    print()
+        summary += f", {skipped} already registered"
+    lines.append(summary)
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def cmd_quickstart(args):
     """Scaffold config/env files so td is ready after init."""
+    import argparse
+    from textwrap import dedent
+
     if not TANDA_DIR.exists():
         print(f"{CYAN}Tandas registry not found. Running 'td init' first...{RESET}")
         cmd_init(argparse.Namespace())
@@ -873,6 +1363,7 @@ def cmd_quickstart(args):
     gitignore_entries = [
         ".tandas/env.example",
         ".tandas/env.local",
+        ".tandas/config.yaml.cache.json",
         ".env",
         ".env.local",
     ]
@@ -897,20 +1388,20 @@ def cmd_trace(args):
 
     command = getattr(args, "trace_command", None)
     if command == "list":
-        entries = load_trace_inbox()
-        if not args.all:
-            entries = [e for e in entries if e.get("status", "pending") == "pending"]
+        entries = load_trace_inbox(None if args.all else "pending")
 
         if not entries:
             print(f"{YELLOW}No trace entries found.{RESET}")
             return
 
+        lines = []
         for entry in entries:
             status = entry.get("status", "pending")
             line = f"[{status}] {entry.get('path')} (source: {entry.get('source', 'unknown')}, ts: {entry.get('ts', 'unknown')})"
             if entry.get("tanda_id"):
                 line += f" → {entry['tanda_id']}"
-            print(line)
+            lines.append(line)
+        sys.stdout.write("\n".join(lines) + "\n")
         return
 
     if command == "scan":
@@ -921,27 +1412,29 @@ def cmd_trace(args):
 
         extensions = args.ext or [".zip", ".trace.zip"]
         extensions = [ext if ext.startswith(".") else f".{ext}" for ext in extensions]
-        existing = {entry.get("path") for entry in load_trace_inbox()}
-        discovered = 0
-
-        for ext in extensions:
-            for path in search_dir.rglob(f"*{ext}"):
-                if not path.is_file():
-                    continue
-                norm = normalize_trace_path(path)
-                if norm in existing:
-                    continue
-                append_trace_inbox_entry({
-                    "path": norm,
-                    "ts": now_iso(),
-                    "source": args.source or "scan",
-                    "status": "pending",
-                })
-                existing.add(norm)
-                discovered += 1
-
-        if discovered:
-            print(f"{GREEN}Discovered {discovered} trace file(s). Link them with 'td trace link'.{RESET}")
+        existing = trace_inbox_paths()
+        new_entries = []
+        ts = now_iso()
+
+        # One walk of the directory for all extensions; entries are appended together.
+        suffixes = tuple(extensions)
+        for path in search_dir.rglob("*"):
+            if not path.name.endswith(suffixes) or not path.is_file():
+                continue
+            norm = normalize_trace_path(path)
+            if norm in existing:
+                continue
+            new_entries.append({
+                "path": norm,
+                "ts": ts,
+                "source": args.source or "scan",
+                "status": "pending",
+            })
+            existing.add(norm)
+
+        if new_entries:
+            append_trace_inbox_entries(new_entries)
+            print(f"{GREEN}Discovered {len(new_entries)} trace file(s). Link them with 'td trace link'.{RESET}")
         else:
             print(f"{YELLOW}No new trace files found (extensions: {', '.join(extensions)}).{RESET}")
         return
@@ -976,9 +1469,9 @@ def cmd_trace(args):
             tanda["notes"] = notes
 
         tanda["updated_at"] = now_iso()
-        tandas[tanda_id] = tanda
-        rewrite_jsonl(tandas)
-        sync_cache_from_json(tandas)
+        conn = tandas_db()
+        append_to_jsonl(tanda)
+        upsert_tanda(conn, tanda)
 
         if update_trace_entry(trace_path, status="linked", tanda_id=tanda_id, linked_at=now_iso()):
             print(f"{GREEN}Linked trace {trace_path} to {tanda_id}.{RESET}")
@@ -990,14 +1483,26 @@ def cmd_trace(args):
 
 
 def cmd_generate(args):
-    """Generate a test skeleton via configured AI providers."""
+    """Generate test skeletons via configured AI providers."""
+    from lib.generator import (
+        GenerationConfigError,
+        build_context,
+        generate_many,
+        get_provider,
+        load_ai_config,
+    )
+    from lib.providers.base import GenerationProviderError
+
     ensure_initialized()
 
-    tandas = load_all_from_jsonl()
-    tanda_id, tanda = find_tanda(tandas, args.id)
-    if not tanda:
-        print(f"{RED}Tandas '{args.id}' not found.{RESET}")
-        sys.exit(1)
+    conn = tandas_db()
+    selected = []
+    for id_or_partial in args.ids:
+        tanda_id, tanda = find_tanda_sql(conn, id_or_partial)
+        if not tanda:
+            print(f"{RED}Tandas '{id_or_partial}' not found.{RESET}")
+            sys.exit(1)
+        selected.append((tanda_id, tanda))
 
     config_path = Path(args.config) if args.config else TANDA_DIR / "config.yaml"
     try:
@@ -1013,45 +1518,79 @@ def cmd_generate(args):
         print(f"{RED}{exc}{RESET}")
         sys.exit(1)
 
-    context = build_context(tanda, Path.cwd())
+    repo_root = Path.cwd()
+    contexts = [build_context(tanda, repo_root) for _, tanda in selected]
     try:
-        generated = provider.generate_test(context)
+        results = generate_many(contexts, provider)
     except GenerationProviderError as exc:
         print(f"{RED}Generation failed: {exc}{RESET}")
         sys.exit(1)
 
-    if args.output:
-        output_path = Path(args.output)
-        output_path.write_text(generated)
-        print(f"{GREEN}Wrote generated test to {output_path}{RESET}")
-    else:
-        print(generated)
+    if len(selected) == 1:
+        if args.output:
+            output_path = Path(args.output)
+            output_path.write_text(results[0])
+            print(f"{GREEN}Wrote generated test to {output_path}{RESET}")
+        else:
+            print(results[0])
+        return
+
+    # Multiple tandas: --output names a directory, one file per tanda.
+    output_dir = Path(args.output) if args.output else None
+    if output_dir:
+        output_dir.mkdir(parents=True, exist_ok=True)
+    for (tanda_id, _), generated in zip(selected, results):
+        if output_dir:
+            output_path = output_dir / f"{tanda_id}.spec.ts"
+            output_path.write_text(generated)
+            print(f"{GREEN}Wrote generated test to {output_path}{RESET}")
+        else:
+            print(f"{BOLD}// {tanda_id}{RESET}")
+            print(generated)
+            print()
 
 
 def cmd_sync(args):
     """Sync JSONL to SQLite cache and optionally to git."""
     ensure_initialized()
 
-    tandas = load_all_from_jsonl()
-    sync_cache_from_json(tandas)
+    # Skip the full cache diff when issues.jsonl is unchanged since the last sync.
+    stat_key = repr(_stat_key(ISSUES_FILE))
+    conn = get_db()
+    # Stored in the cache rather than a file of its own so it is never staged.
+    last_sync = conn.execute("SELECT value FROM cache_meta WHERE key = 'last_sync'").fetchone()
+    if last_sync is not None and last_sync[0] == stat_key:
+        tandas_db()
+        print(f"Cache up to date: {ISSUES_FILE} unchanged since last sync")
+    else:
+        tandas = load_all_from_jsonl()
+        sync_cache_from_json(tandas)
+        conn.execute("INSERT OR REPLACE INTO cache_meta (key, value) VALUES ('last_sync', ?)", (stat_key,))
+        print(f"Synced {len(tandas)} tanda(s) to SQLite cache")
 
-    print(f"Synced {len(tandas)} tanda(s) to SQLite cache")
+    # Other .tandas files (e.g. trace_inbox.jsonl) may have changed, so always stage.
+    if git_stage_registry():
+        print(f"Staged {TANDA_DIR}/ changes for git")
 
-    # Git operations
-    if Path(".git").exists():
-        result = subprocess.run(
-            ["git", "status", "--porcelain", str(TANDA_DIR)],
-            capture_output=True,
-            text=True
-        )
 
-        if result.stdout.strip():
-            subprocess.run(["git", "add", str(TANDA_DIR)], capture_output=True)
-            print(f"Staged {TANDA_DIR}/ changes for git")
+def cmd_compact(args):
+    """Drop superseded records from the JSONL registry."""
+    ensure_initialized()
+
+    load_all_from_jsonl()
+    if _JSONL_CACHE["skipped"]:
+        print(f"{RED}Error: {ISSUES_FILE} has {_JSONL_CACHE['skipped']} unparseable line(s); "
+              f"fix them before compacting.{RESET}")
+        sys.exit(1)
+    dropped = compact_jsonl()
+    tandas = sync_cache_from_json()
+    print(f"Compacted {ISSUES_FILE}: {len(tandas)} tanda(s), {dropped} superseded line(s) removed")
 
 
 def cmd_daemon(args):
     """Manage the Go daemon lifecycle (start/stop/status)."""
+    import subprocess
+
     ensure_initialized()
 
     action = getattr(args, "daemon_command", None)
@@ -1116,34 +1655,42 @@ def topological_sort(tandas: dict, filter_status: list = None) -> tuple:
     relevant = {tid: t for tid, t in tandas.items() if t.get("status") in filter_status}
 
     # Build in-degree map (how many dependencies each tanda has within relevant set)
+    # and the reverse adjacency list (which tandas depend on each one).
     in_degree = {}
+    dependents = defaultdict(list)
     for tid, t in relevant.items():
         deps = [d for d in t.get("depends_on", []) if d in relevant]
         in_degree[tid] = len(deps)
-
-    # Find all with zero in-degree (no dependencies or deps outside relevant set)
-    queue = [tid for tid, deg in in_degree.items() if deg == 0]
+        for dep in deps:
+            dependents[dep].append(tid)
+
+    # Heap ordered by status (flaky first), then updated_at (oldest first), then
+    # by the order tandas became ready.
+    order = 0
+
+    def entry(tid):
+        nonlocal order
+        order += 1
+        t = relevant[tid]
+        return (0 if t.get("status") == "flaky" else 1, t.get("updated_at", ""), order, tid)
+
+    # Start with all zero in-degree (no dependencies or deps outside relevant set)
+    queue = [entry(tid) for tid, deg in in_degree.items() if deg == 0]
+    heapq.heapify(queue)
     sorted_list = []
 
     while queue:
-        # Sort queue by status (flaky first) then by updated_at (oldest first)
-        queue.sort(key=lambda x: (
-            0 if relevant[x].get("status") == "flaky" else 1,
-            relevant[x].get("updated_at", "")
-        ))
-
-        current = queue.pop(0)
+        current = heapq.heappop(queue)[-1]
         sorted_list.append(current)
 
         # Reduce in-degree of dependents
-        for tid, t in relevant.items():
-            if current in t.get("depends_on", []):
-                in_degree[tid] -= 1
-                if in_degree[tid] == 0:
-                    queue.append(tid)
+        for tid in dependents[current]:
+            in_degree[tid] -= 1
+            if in_degree[tid] == 0:
+                heapq.heappush(queue, entry(tid))
 
     # Any remaining with in_degree > 0 are blocked (circular or missing deps)
-    blocked = [tid for tid, deg in in_degree.items() if deg > 0 and tid not in sorted_list]
+    blocked = [tid for tid, deg in in_degree.items() if deg > 0]
 
     return sorted_list, blocked
 
@@ -1162,16 +1709,31 @@ def cmd_ready(args):
     """Show high-priority tandas in execution order (dependencies first)."""
     ensure_initialized()
 
-    tandas = load_all_from_jsonl()
-
-    if not tandas:
+    conn = tandas_db()
+    if not conn.execute("SELECT EXISTS (SELECT 1 FROM tandas)").fetchone()[0]:
         print(f"{YELLOW}No tandas found.{RESET}")
         print("Run 'td discover' to import existing tests.")
         return
 
+    # Only active/flaky tandas are scheduled; deprecated ones matter solely as blockers.
+    tandas = {}
+    for row in conn.execute("""
+        SELECT id, title, file, depends_on, status, updated_at FROM tandas
+        WHERE status IN ('active', 'flaky') ORDER BY status, updated_at
+    """):
+        tandas[row["id"]] = {
+            "id": row["id"],
+            "title": row["title"],
+            "file": row["file"],
+            "depends_on": loads(row["depends_on"] or "[]"),
+            "status": row["status"],
+            "updated_at": row["updated_at"] or "",
+        }
+    for row in conn.execute("SELECT id FROM tandas WHERE status = 'deprecated'"):
+        tandas[row["id"]] = {"id": row["id"], "status": "deprecated"}
+
     # Separate flaky tests (highest priority for healing)
-    flaky = {tid: t for tid, t in tandas.items() if t.get("status") == "flaky"}
-    active = {tid: t for tid, t in tandas.items() if t.get("status") == "active"}
+    flaky = {tid: t for tid, t in tandas.items() if t["status"] == "flaky"}
 
     # Get topologically sorted active tests
     sorted_ids, blocked_ids = topological_sort(tandas, ["active"])
@@ -1185,16 +1747,17 @@ def cmd_ready(args):
             sorted_ids.remove(tid)
 
     # Print results
+    lines = []
     if flaky:
-        print(f"{BOLD}{YELLOW}⚠ Flaky tests (need healing):{RESET}")
+        lines.append(f"{BOLD}{YELLOW}⚠ Flaky tests (need healing):{RESET}")
         for tid, t in flaky.items():
-            print(f"  {tid}: {t['title']}")
+            lines.append(f"  {tid}: {t['title']}")
             if t.get("file"):
-                print(f"    └─ {t['file']}")
-        print()
+                lines.append(f"    └─ {t['file']}")
+        lines.append("")
 
     if sorted_ids:
-        print(f"{BOLD}{GREEN}✓ Ready (in execution order):{RESET}")
+        lines.append(f"{BOLD}{GREEN}✓ Ready (in execution order):{RESET}")
         for i, tid in enumerate(sorted_ids, 1):
             t = tandas[tid]
             deps = t.get("depends_on", [])
@@ -1203,29 +1766,32 @@ def cmd_ready(args):
                 resolved = [d for d in deps if d in tandas and tandas[d].get("status") == "active"]
                 if resolved:
                     dep_info = f" (after: {', '.join(resolved[:2])}{'...' if len(resolved) > 2 else ''})"
-            print(f"  {i}. {tid}: {t['title']}{dep_info}")
-        print()
+            lines.append(f"  {i}. {tid}: {t['title']}{dep_info}")
+        lines.append("")
 
     if blocked_by_flaky:
-        print(f"{BOLD}{RED}✗ Blocked (waiting on flaky):{RESET}")
+        lines.append(f"{BOLD}{RED}✗ Blocked (waiting on flaky):{RESET}")
         for tid, blocking in blocked_by_flaky:
             t = tandas[tid]
             blocker_names = [f"{b[0]}" for b in blocking]
-            print(f"  {tid}: {t['title']}")
-            print(f"    └─ waiting on: {', '.join(blocker_names)}")
-        print()
+            lines.append(f"  {tid}: {t['title']}")
+            lines.append(f"    └─ waiting on: {', '.join(blocker_names)}")
+        lines.append("")
 
     if blocked_ids:
-        print(f"{BOLD}{CYAN}○ Blocked (circular/missing deps):{RESET}")
+        lines.append(f"{BOLD}{CYAN}○ Blocked (circular/missing deps):{RESET}")
         for tid in blocked_ids:
             t = tandas[tid]
-            print(f"  {tid}: {t['title']}")
-        print()
+            lines.append(f"  {tid}: {t['title']}")
+        lines.append("")
 
     # Summary
     total = len(flaky) + len(sorted_ids) + len(blocked_by_flaky) + len(blocked_ids)
     if total == 0:
-        print(f"{GREEN}No tandas need attention.{RESET}")
+        lines.append(f"{GREEN}No tandas need attention.{RESET}")
+
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
 
 
 def cmd_version(args):
@@ -1238,66 +1804,63 @@ def cmd_version(args):
 # Main
 # =============================================================================
 
-def main():
-    parser = argparse.ArgumentParser(
-        prog="td",
-        description="Tandas: Persistent test registry for AI-orchestrated test suites",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
-Examples:
-  td init                          Initialize registry
-  td create "Login Flow"           Create new tanda
-  td create "Auth" --file tests/auth.spec.ts --covers auth,session
-  td list --flaky                  Show flaky tests
-  td show td-abc123                View tanda details
-  td update td-abc123 --status flaky --note "Timing issue"
-  td discover                      Auto-import test files
-  td ready                         Show what needs attention
-  td sync                          Sync to SQLite and git
-        """
-    )
-    parser.add_argument("--version", "-v", action="store_true", help="Show version")
+def _provider_choice(value: str) -> str:
+    """argparse type for provider options; imports the registry only when used."""
+    import argparse
 
-    subparsers = parser.add_subparsers(dest="command", metavar="command")
+    from lib.generator import PROVIDERS
+
+    if value not in PROVIDERS:
+        choices = ", ".join(sorted(PROVIDERS))
+        raise argparse.ArgumentTypeError(f"invalid provider '{value}' (choose from {choices})")
+    return value
 
-    # init
+
+def _build_init_parser(subparsers):
     init_p = subparsers.add_parser("init", help="Initialize Tandas registry")
     init_p.set_defaults(func=cmd_init)
 
-    # quickstart
+
+def _build_quickstart_parser(subparsers):
     quick_p = subparsers.add_parser("quickstart", help="Create config/env scaffolding")
-    quick_p.add_argument("--default-provider", default="claude", choices=sorted(PROVIDERS.keys()),
+    quick_p.add_argument("--default-provider", default="claude", type=_provider_choice,
+                         metavar="{" + ",".join(PROVIDER_NAMES) + "}",
                          help="Default provider to set in config (default: claude)")
     quick_p.add_argument("--force", action="store_true", help="Overwrite existing config/env files")
     quick_p.add_argument("--force-env", action="store_true", help="Only overwrite env example")
     quick_p.add_argument("--force-app", action="store_true", help="Overwrite tanda.json template")
     quick_p.set_defaults(func=cmd_quickstart)
 
-    # create
+
+def _build_create_parser(subparsers):
     create_p = subparsers.add_parser("create", help="Create a new tanda")
     create_p.add_argument("title", help="Test title/name")
     create_p.add_argument("--file", "-f", help="Path to test file")
     create_p.add_argument("--status", "-s", default="active",
-                          choices=["active", "flaky", "deprecated"],
+                          choices=_STATUSES,
                           help="Initial status (default: active)")
     create_p.add_argument("--covers", "-c", help="Comma-separated coverage tags")
     create_p.set_defaults(func=cmd_create)
 
-    # list
+
+def _build_list_parser(subparsers):
     list_p = subparsers.add_parser("list", help="List tandas")
     list_p.add_argument("--active", "-a", action="store_true", help="Show only active")
     list_p.add_argument("--flaky", "-f", action="store_true", help="Show only flaky")
     list_p.add_argument("--deprecated", "-d", action="store_true", help="Show only deprecated")
     list_p.add_argument("--status", "-s", help="Filter by status")
-    list_p.add_argument("--covers", "-c", help="Filter by coverage tag")
+    list_p.add_argument("--covers", "-c", help="Filter by coverage tag(s), comma-separated (any match)")
+    list_p.add_argument("--all-covers", action="store_true", help="With several --covers tags, require all of them")
     list_p.set_defaults(func=cmd_list)
 
-    # show
+
+def _build_show_parser(subparsers):
     show_p = subparsers.add_parser("show", help="Show tanda details")
     show_p.add_argument("id", help="Tandas ID (full or partial)")
     show_p.set_defaults(func=cmd_show)
 
-    # update
+
+def _build_update_parser(subparsers):
     update_p = subparsers.add_parser("update", help="Update a tanda")
     update_p.add_argument("id", help="Tandas ID (full or partial)")
     update_p.add_argument("--status", "-s", help="New status: active, flaky, deprecated")
@@ -1306,13 +1869,14 @@ Examples:
     update_p.add_argument("--covers", "-c", help="Set coverage tags (comma-separated)")
     update_p.add_argument("--add-dep", help="Add dependency on another tanda")
     update_p.add_argument("--remove-dep", help="Remove dependency")
-    update_p.add_argument("--run-result", "-r", choices=["pass", "fail", "skip"],
+    update_p.add_argument("--run-result", "-r", choices=_RUN_RESULTS,
                           help="Record a test run result")
     update_p.add_argument("--run-duration", help="Duration of test run (e.g., '2.3s')")
     update_p.add_argument("--run-trace", help="Path to Playwright trace file")
     update_p.set_defaults(func=cmd_update)
 
-    # dep (dependency management)
+
+def _build_dep_parser(subparsers):
     dep_p = subparsers.add_parser("dep", help="Manage dependencies")
     dep_sub = dep_p.add_subparsers(dest="dep_command", metavar="action")
 
@@ -1329,20 +1893,22 @@ Examples:
 
     dep_p.set_defaults(func=cmd_dep)
 
-    # discover
+
+def _build_discover_parser(subparsers):
     discover_p = subparsers.add_parser("discover", help="Auto-discover test files")
     discover_p.add_argument("--dir", "-d", help="Directory to search (default: current)")
     discover_p.add_argument("--verbose", "-v", action="store_true", help="Show skipped files")
     discover_p.set_defaults(func=cmd_discover)
 
-    # trace
+
+def _build_trace_parser(subparsers):
     trace_p = subparsers.add_parser("trace", help="Manage test traces")
     trace_sub = trace_p.add_subparsers(dest="trace_command", metavar="action")
 
     trace_link = trace_sub.add_parser("link", help="Link a trace file to a tanda")
     trace_link.add_argument("id", help="Tandas ID (full or partial)")
     trace_link.add_argument("trace", help="Path to trace file")
-    trace_link.add_argument("--result", choices=["pass", "fail", "skip", "unknown"], default="fail",
+    trace_link.add_argument("--result", choices=_TRACE_RESULTS, default="fail",
                             help="Result to record for the linked run (default: fail)")
     trace_link.add_argument("--duration", help="Duration of the trace/run (optional)")
     trace_link.add_argument("--note", help="Attach a note alongside the trace entry")
@@ -1357,19 +1923,30 @@ Examples:
 
     trace_p.set_defaults(func=cmd_trace)
 
-    # generate
+
+def _build_generate_parser(subparsers):
     generate_p = subparsers.add_parser("generate", help="Generate or plan a test via AI provider")
-    generate_p.add_argument("id", help="Tandas ID (full or partial)")
-    generate_p.add_argument("--provider", choices=sorted(PROVIDERS.keys()), help="Provider override")
+    generate_p.add_argument("ids", nargs="+", metavar="id",
+                            help="Tandas ID(s) (full or partial); several are generated concurrently")
+    generate_p.add_argument("--provider", type=_provider_choice, metavar="{" + ",".join(PROVIDER_NAMES) + "}",
+                            help="Provider override")
     generate_p.add_argument("--config", help="Path to config.yaml (default: .tandas/config.yaml)")
-    generate_p.add_argument("--output", "-o", help="Write output to file instead of stdout")
+    generate_p.add_argument("--output", "-o",
+                            help="Write output to file instead of stdout (a directory when several IDs are given)")
     generate_p.set_defaults(func=cmd_generate)
 
-    # sync
+
+def _build_sync_parser(subparsers):
     sync_p = subparsers.add_parser("sync", help="Sync JSONL to SQLite and git")
     sync_p.set_defaults(func=cmd_sync)
 
-    # daemon
+
+def _build_compact_parser(subparsers):
+    compact_p = subparsers.add_parser("compact", help="Drop superseded records from issues.jsonl")
+    compact_p.set_defaults(func=cmd_compact)
+
+
+def _build_daemon_parser(subparsers):
     daemon_p = subparsers.add_parser("daemon", help="Manage the Go daemon")
     daemon_sub = daemon_p.add_subparsers(dest="daemon_command", metavar="action")
 
@@ -1384,14 +1961,76 @@ Examples:
 
     daemon_p.set_defaults(func=cmd_daemon)
 
-    # ready
+
+def _build_ready_parser(subparsers):
     ready_p = subparsers.add_parser("ready", help="Show tandas needing attention")
     ready_p.set_defaults(func=cmd_ready)
 
-    # version
+
+def _build_version_parser(subparsers):
     version_p = subparsers.add_parser("version", help="Show version")
     version_p.set_defaults(func=cmd_version)
 
+
+# Subcommand name -> function adding its parser, in --help order.
+_PARSER_BUILDERS = {
+    "init": _build_init_parser,
+    "quickstart": _build_quickstart_parser,
+    "create": _build_create_parser,
+    "list": _build_list_parser,
+    "show": _build_show_parser,
+    "update": _build_update_parser,
+    "dep": _build_dep_parser,
+    "discover": _build_discover_parser,
+    "trace": _build_trace_parser,
+    "generate": _build_generate_parser,
+    "sync": _build_sync_parser,
+    "compact": _build_compact_parser,
+    "daemon": _build_daemon_parser,
+    "ready": _build_ready_parser,
+    "version": _build_version_parser,
+}
+
+
+def main():
+    # `td --version` answers without importing argparse or building parsers.
+    if sys.argv[1:] in (["--version"], ["-v"], ["version"]):
+        cmd_version(None)
+        return
+
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="td",
+        description="Tandas: Persistent test registry for AI-orchestrated test suites",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  td init                          Initialize registry
+  td create "Login Flow"           Create new tanda
+  td create "Auth" --file tests/auth.spec.ts --covers auth,session
+  td list --flaky                  Show flaky tests
+  td show td-abc123                View tanda details
+  td update td-abc123 --status flaky --note "Timing issue"
+  td discover                      Auto-import test files
+  td ready                         Show what needs attention
+  td sync                          Sync to SQLite and git
+        """
+    )
+    parser.add_argument("--version", "-v", action="store_true", help="Show version")
+
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+
+    # Building every subparser dominates startup, so when the first argument
+    # names a command only that one is built. Anything else (no command,
+    # top-level flags, typos) builds them all for --help and usage errors.
+    argv = sys.argv[1:]
+    if argv and argv[0] in _PARSER_BUILDERS:
+        _PARSER_BUILDERS[argv[0]](subparsers)
+    else:
+        for build in _PARSER_BUILDERS.values():
+            build(subparsers)
+
     args = parser.parse_args()
 
     if args.version:
@@ -0,0 +1,148 @@
+import io
+import socket
+import sys
+import threading
+import time
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from lib.providers import base, transport  # noqa: E402
+
+PROXY_VARS = ("http_proxy", "https_proxy", "all_proxy", "no_proxy")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append(self.path)
+        if self.path == "/hangup":
+            # Read the request, then reset without answering.
+            self.close_connection = True
+            return
+        if self.path == "/error":
+            self._reply(503, b"overloaded")
+        else:
+            self._reply(200, self.path.encode())
+        # Drop the connection without announcing it, like an idle keep-alive timeout.
+        if self.path == "/drop":
+            self.close_connection = True
+
+    def _reply(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    for name in PROXY_VARS:
+        monkeypatch.delenv(name, raising=False)
+        monkeypatch.delenv(name.upper(), raising=False)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.connections = 0
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _url(httpd, path):
+    return f"http://127.0.0.1:{httpd.server_address[1]}{path}"
+
+
+def test_post_reuses_the_connection(server):
+    assert transport.post(_url(server, "/a"), b"{}", {}) == b"/a"
+    assert transport.post(_url(server, "/b"), b"{}", {}) == b"/b"
+    assert server.connections == 1
+
+
+def test_post_reconnects_when_the_idle_connection_was_closed(server):
+    assert transport.post(_url(server, "/drop"), b"{}", {}) == b"/drop"
+    conn = transport._connections()[("http", f"127.0.0.1:{server.server_address[1]}")]
+    deadline = time.monotonic() + 5
+    while not transport._is_stale(conn) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert transport.post(_url(server, "/after"), b"{}", {}) == b"/after"
+    assert server.connections == 2
+
+
+def test_post_does_not_resend_once_the_request_was_sent(server):
+    assert transport.post(_url(server, "/a"), b"{}", {}) == b"/a"
+    with pytest.raises(urllib.error.URLError):
+        transport.post(_url(server, "/hangup"), b"{}", {})
+    assert server.requests == ["/a", "/hangup"]
+
+
+def test_post_raises_http_error_with_body(server):
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        transport.post(_url(server, "/error"), b"{}", {})
+    assert excinfo.value.code == 503
+    assert excinfo.value.read() == b"overloaded"
+
+
+def test_post_goes_through_the_environment_proxy(server, monkeypatch):
+    monkeypatch.setenv("http_proxy", _url(server, ""))
+    # The proxy sees the absolute target URL as the request path.
+    assert transport.post("http://api.example.test/v1", b"{}", {}) == b"http://api.example.test/v1"
+
+
+class _StubProvider(base.AIProvider):
+    display_name = "Stub"
+    retry_backoff = 0
+
+    def _build_request(self, prompt):
+        return "https://api.example.test/v1", {}, b"{}"
+
+    def _parse_response(self, data):
+        return data["text"]
+
+
+def _stub_post(monkeypatch, *outcomes):
+    calls = []
+
+    def post(url, body, headers, timeout=60):
+        outcome = outcomes[len(calls)]
+        calls.append(url)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(base, "post", post)
+    return calls
+
+
+def _context():
+    return base.TestContext(tanda={"title": "Login Flow"})
+
+
+def test_send_retries_retryable_status(monkeypatch):
+    busy = urllib.error.HTTPError("https://api.example.test/v1", 503, "busy", {}, io.BytesIO(b"busy"))
+    calls = _stub_post(monkeypatch, busy, b'{"text": "ok"}')
+    provider = _StubProvider(base.ProviderConfig(name="stub", api_key="key"))
+    assert provider.generate_test(_context()) == "ok"
+    assert len(calls) == 2
+
+
+def test_send_does_not_resend_after_a_timeout(monkeypatch):
+    calls = _stub_post(monkeypatch, urllib.error.URLError(socket.timeout("timed out")), b'{"text": "ok"}')
+    provider = _StubProvider(base.ProviderConfig(name="stub", api_key="key"))
+    with pytest.raises(base.GenerationProviderError):
+        provider.generate_test(_context())
+    assert len(calls) == 1
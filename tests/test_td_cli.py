@@ -1,23 +1,64 @@
+import contextlib
+import functools
+import io
 import json
 import os
 import shutil
+import sqlite3
 import subprocess
 import sys
 import time
 from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
 
 import pytest
 
 TD_CLI = Path(__file__).resolve().parents[1] / "td.py"
 TD_DAEMON_DEFAULT = Path(__file__).resolve().parents[1] / "daemon" / "td-daemon"
+_BASE_ENV = {"PYTHONUNBUFFERED": "1", **os.environ}
+
+sys.path.insert(0, str(TD_CLI.parent))
+import td  # noqa: E402
+from lib import fastjson  # noqa: E402
+
+
+def _reset_td_state():
+    """Drop per-process state so each in-process run starts like a fresh CLI."""
+    td._close_db()
+    td._JSONL_CACHE.update(key=None, data=None, lines=0, skipped=0)
 
 
 def run_td(tmp_path, *args, extra_env=None, check=True):
-    """Run td.py with the given arguments inside tmp_path."""
-    env = os.environ.copy()
-    env.setdefault("PYTHONUNBUFFERED", "1")
-    if extra_env:
-        env.update(extra_env)
+    """Run td's main() in-process with the given arguments inside tmp_path."""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    returncode = 0
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        with mock.patch.object(sys, "argv", ["td", *args]), \
+                mock.patch.dict(os.environ, extra_env or {}), \
+                contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                td.main()
+            except SystemExit as exc:
+                returncode = exc.code if isinstance(exc.code, int) else 1
+            finally:
+                _reset_td_state()
+    finally:
+        os.chdir(cwd)
+
+    result = SimpleNamespace(stdout=stdout.getvalue(), stderr=stderr.getvalue(), returncode=returncode)
+    if check and result.returncode != 0:
+        raise AssertionError(
+            f"td {' '.join(args)} failed with code {result.returncode}:\nSTDOUT: {result.stdout}\nSTDERR: {result.stderr}"
+        )
+    return result
+
+
+def run_td_subprocess(tmp_path, *args, extra_env=None, check=True):
+    """Run td.py in a separate interpreter (for tests that need a real process)."""
+    env = {**_BASE_ENV, **extra_env} if extra_env else _BASE_ENV
     result = subprocess.run(
         [sys.executable, str(TD_CLI), *args],
         cwd=tmp_path,
@@ -33,27 +74,23 @@ def run_td(tmp_path, *args, extra_env=None, check=True):
 
 
 def load_tandas(tmp_path):
+    # Updates are appended, so later lines supersede earlier ones for the same id.
     issues = Path(tmp_path) / ".tandas" / "issues.jsonl"
-    tandas = []
-    if issues.exists():
-        with issues.open() as handle:
-            for line in handle:
-                line = line.strip()
-                if line:
-                    tandas.append(json.loads(line))
-    return tandas
+    if not issues.exists():
+        return []
+    tandas = {}
+    for line in issues.read_bytes().splitlines():
+        if line.strip():
+            tanda = fastjson.loads(line)
+            tandas[tanda["id"]] = tanda
+    return list(tandas.values())
 
 
 def load_trace_entries(tmp_path):
     inbox = Path(tmp_path) / ".tandas" / "trace_inbox.jsonl"
-    entries = []
-    if inbox.exists():
-        with inbox.open() as handle:
-            for line in handle:
-                line = line.strip()
-                if line:
-                    entries.append(json.loads(line))
-    return entries
+    if not inbox.exists():
+        return []
+    return [fastjson.loads(line) for line in inbox.read_bytes().splitlines() if line.strip()]
 
 
 def test_init_creates_registry(tmp_path):
@@ -64,6 +101,13 @@ def test_init_creates_registry(tmp_path):
     assert (tanda_dir / "db.sqlite").exists()
 
 
+def test_version_fast_path_matches_subcommand(tmp_path):
+    expected = run_td(tmp_path, "version").stdout
+    assert "td (Tandas CLI) v" in expected
+    assert run_td(tmp_path, "--version").stdout == expected
+    assert run_td(tmp_path, "-v").stdout == expected
+
+
 def test_create_and_list_tanda(tmp_path):
     run_td(tmp_path, "init")
     run_td(
@@ -83,6 +127,31 @@ def test_create_and_list_tanda(tmp_path):
     assert "Login Flow" in result.stdout
 
 
+def test_list_filters_by_cover_tag(tmp_path):
+    run_td(tmp_path, "init")
+    run_td(tmp_path, "create", "Login Flow", "--covers", "auth,session")
+    run_td(tmp_path, "create", "Checkout", "--covers", "payments")
+    tanda_id = next(t["id"] for t in load_tandas(tmp_path) if t["title"] == "Checkout")
+    run_td(tmp_path, "update", tanda_id, "--covers", "payments,auth-extra")
+
+    result = run_td(tmp_path, "list", "--covers", "auth")
+    assert "Login Flow" in result.stdout
+    assert "Checkout" not in result.stdout
+
+    result = run_td(tmp_path, "list", "--covers", "auth-extra")
+    assert "Checkout" in result.stdout
+    assert "Login Flow" not in result.stdout
+
+    result = run_td(tmp_path, "list", "--covers", "session,payments")
+    assert "Login Flow" in result.stdout
+    assert "Checkout" in result.stdout
+    assert "2 tanda(s)" in result.stdout
+
+    result = run_td(tmp_path, "list", "--covers", "auth,session", "--all-covers")
+    assert "Login Flow" in result.stdout
+    assert "Checkout" not in result.stdout
+
+
 def test_dependency_management_affects_ready_order(tmp_path):
     run_td(tmp_path, "init")
 
@@ -136,10 +205,15 @@ def test_daemon_status_without_running(tmp_path):
     assert "daemon not running" in result.stdout.lower()
 
 
-@pytest.mark.skipif(shutil.which("go") is None, reason="Go toolchain required")
+@functools.lru_cache(maxsize=1)
+def _has_go():
+    return shutil.which("go") is not None
+
+
+@pytest.mark.skipif("not _has_go()", reason="Go toolchain required")
 def test_daemon_imports_jsonl_when_running(tmp_path):
-    run_td(tmp_path, "quickstart")
-    run_td(tmp_path, "create", "Daemon Ready Test")
+    run_td_subprocess(tmp_path, "quickstart")
+    run_td_subprocess(tmp_path, "create", "Daemon Ready Test")
 
     # build daemon if not already
     daemon_bin = TD_DAEMON_DEFAULT
@@ -165,21 +239,23 @@ def test_daemon_imports_jsonl_when_running(tmp_path):
     )
 
     sock_path = Path(tmp_path) / ".tandas" / "td.sock"
-    start = time.time()
-    while time.time() - start < 10:
+    deadline = time.monotonic() + 10
+    delay = 0.005
+    while time.monotonic() < deadline:
         if sock_path.exists():
             break
-        time.sleep(0.2)
+        time.sleep(delay)
+        delay = min(delay * 1.5, 0.1)
     else:
         proc.terminate()
         pytest.skip("daemon socket not created")
 
-    status = run_td(tmp_path, "daemon", "status", extra_env=env)
+    status = run_td_subprocess(tmp_path, "daemon", "status", extra_env=env)
     assert "daemon running" in status.stdout.lower()
 
-    run_td(tmp_path, "generate", load_tandas(tmp_path)[0]["id"], extra_env=env)
+    run_td_subprocess(tmp_path, "generate", load_tandas(tmp_path)[0]["id"], extra_env=env)
 
-    run_td(tmp_path, "daemon", "stop", extra_env=env)
+    run_td_subprocess(tmp_path, "daemon", "stop", extra_env=env)
     proc.terminate()
     try:
         proc.wait(timeout=5)
@@ -208,3 +284,208 @@ def test_trace_scan_and_link(tmp_path):
 
     entries = load_trace_entries(tmp_path)
     assert entries[0]["status"] == "linked"
+
+
+def test_generate_picks_up_config_edits_after_caching(tmp_path):
+    run_td(tmp_path, "quickstart", "--default-provider", "gemini")
+    run_td(tmp_path, "create", "Cached Config")
+    tanda_id = load_tandas(tmp_path)[0]["id"]
+
+    first = run_td(tmp_path, "generate", tanda_id, extra_env={"GEMINI_API_KEY": ""}).stdout
+    assert "Gemini provider not configured" in first
+    assert (Path(tmp_path) / ".tandas" / "config.yaml.cache.json").exists()
+
+    config = Path(tmp_path) / ".tandas" / "config.yaml"
+    config.write_text(config.read_text().replace("default_provider: gemini", "default_provider: openai"))
+
+    second = run_td(tmp_path, "generate", tanda_id, extra_env={"OPENAI_API_KEY": ""}).stdout
+    assert "OpenAI provider not configured" in second
+
+
+def test_generate_multiple_ids_writes_one_file_each(tmp_path):
+    run_td(tmp_path, "init")
+    run_td(tmp_path, "create", "First Flow")
+    run_td(tmp_path, "create", "Second Flow")
+    ids = [t["id"] for t in load_tandas(tmp_path)]
+
+    out_dir = Path(tmp_path) / "generated"
+    run_td(tmp_path, "generate", *ids, "--provider", "openai", "--output", str(out_dir))
+
+    for tanda_id in ids:
+        assert "OpenAI provider not configured" in (out_dir / f"{tanda_id}.spec.ts").read_text()
+
+
+def test_show_resyncs_cache_after_external_registry_edit(tmp_path):
+    run_td(tmp_path, "init")
+    run_td(tmp_path, "create", "Local Flow")
+
+    issues = Path(tmp_path) / ".tandas" / "issues.jsonl"
+    pulled = {"id": "td-feedbeef", "title": "Pulled Flow", "status": "flaky", "depends_on": []}
+    legacy = {"id": "td-aaaa1111", "title": "Legacy Flow", "status": "active", "notes": "[WIP] timing issue"}
+    with issues.open("a") as handle:
+        handle.write(json.dumps(pulled) + "\n")
+        handle.write(json.dumps(legacy) + "\n")
+
+    result = run_td(tmp_path, "show", "beef")
+    assert "td-feedbeef" in result.stdout
+    assert "Pulled Flow" in result.stdout
+    assert "[WIP] timing issue" in run_td(tmp_path, "show", "aaaa1111").stdout
+
+    # The daemon's watcher re-imports rows without the derived short_id column.
+    with sqlite3.connect(tmp_path / ".tandas" / "db.sqlite") as conn:
+        conn.execute("UPDATE tandas SET short_id = NULL")
+    conn.close()
+    assert "Pulled Flow" in run_td(tmp_path, "show", "feedbeef").stdout
+    assert "Pulled Flow" in run_td(tmp_path, "show", "td-feed").stdout
+
+    result = run_td(tmp_path, "list", "--flaky")
+    assert "Pulled Flow" in result.stdout
+    assert "Local Flow" not in result.stdout
+
+
+def test_updates_append_and_compact(tmp_path):
+    run_td(tmp_path, "init")
+    run_td(tmp_path, "create", "Login Flow")
+    run_td(tmp_path, "create", "Checkout")
+    tanda_id = load_tandas(tmp_path)[0]["id"]
+    issues = Path(tmp_path) / ".tandas" / "issues.jsonl"
+
+    run_td(tmp_path, "update", tanda_id, "--note", "first")
+    assert len(issues.read_text().splitlines()) == 3
+
+    run_td(tmp_path, "update", tanda_id, "--status", "flaky")
+    # Blank and whitespace-only lines are ignored, not reported as unparseable.
+    with issues.open("a") as handle:
+        handle.write("\n  \n\r\n")
+    run_td(tmp_path, "compact")
+    assert len(issues.read_text().splitlines()) == 2
+
+    tanda = next(t for t in load_tandas(tmp_path) if t["id"] == tanda_id)
+    assert tanda["status"] == "flaky"
+    assert tanda["notes"][0]["text"] == "first"
+
+
+def test_only_writes_compact_a_mostly_superseded_registry(tmp_path):
+    run_td(tmp_path, "init")
+    issues = Path(tmp_path) / ".tandas" / "issues.jsonl"
+    with issues.open("a") as handle:
+        for title in ("Draft", "Renamed", "Final"):
+            handle.write(json.dumps({"id": "td-feedbeef", "title": title, "status": "active"}) + "\n")
+        handle.write("<<<<<<< HEAD\n")
+    original = issues.read_text()
+
+    # Reads never rewrite the tracked registry.
+    assert "Final" in run_td(tmp_path, "show", "beef").stdout
+    assert "Synced 1 tanda(s)" in run_td(tmp_path, "sync").stdout
+    assert issues.read_text() == original
+
+    # Neither do writes, or `td compact`, while a line would be dropped.
+    run_td(tmp_path, "update", "beef", "--note", "kept")
+    assert issues.read_text().startswith(original)
+    assert "unparseable" in run_td(tmp_path, "compact", check=False).stdout
+
+    issues.write_text("".join(line + "\n" for line in issues.read_text().splitlines() if line != "<<<<<<< HEAD"))
+    run_td(tmp_path, "update", "beef", "--status", "flaky")
+    records = [json.loads(line) for line in issues.read_text().splitlines()]
+    assert [(t["title"], t["status"]) for t in records] == [("Final", "flaky")]
+
+
+def test_provider_names_match_generator_registry():
+    from lib.generator import PROVIDERS
+
+    assert td.PROVIDER_NAMES == tuple(sorted(PROVIDERS))
+
+
+def test_run_results_drive_flakiness_window(tmp_path):
+    run_td(tmp_path, "init")
+    run_td(tmp_path, "create", "Login Flow")
+    tanda_id = load_tandas(tmp_path)[0]["id"]
+
+    for result in ["fail"] + ["pass"] * 3:
+        run_td(tmp_path, "update", tanda_id, "--run-result", result)
+    assert load_tandas(tmp_path)[0]["status"] == "flaky"
+    assert "Flakiness:   \033[93m25%" in run_td(tmp_path, "show", tanda_id).stdout
+
+    # Once the failure falls out of the window the tanda is healthy again.
+    for _ in range(7):
+        run_td(tmp_path, "update", tanda_id, "--run-result", "pass")
+    assert load_tandas(tmp_path)[0]["status"] == "active"
+    assert "Flakiness" not in run_td(tmp_path, "show", tanda_id).stdout
+
+    # A cache without the row (e.g. a line the daemon could not import) still works.
+    with sqlite3.connect(tmp_path / ".tandas" / "db.sqlite") as conn:
+        conn.execute("DELETE FROM tandas WHERE id = ?", (tanda_id,))
+    conn.close()
+    run_td(tmp_path, "update", tanda_id, "--run-result", "fail")
+    assert load_tandas(tmp_path)[0]["run_history"][-1]["result"] == "fail"
+
+
+def test_sync_skips_when_registry_unchanged(tmp_path):
+    run_td(tmp_path, "init")
+    run_td(tmp_path, "create", "Login Flow")
+
+    assert "Synced 1 tanda(s)" in run_td(tmp_path, "sync").stdout
+    assert "Cache up to date" in run_td(tmp_path, "sync").stdout
+    assert not (tmp_path / ".tandas" / ".last_sync").exists()
+
+    run_td(tmp_path, "create", "Checkout")
+    assert "Synced 2 tanda(s)" in run_td(tmp_path, "sync").stdout
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git required")
+def test_sync_stages_only_shared_registry_files(tmp_path):
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    run_td(tmp_path, "init")
+    run_td(tmp_path, "create", "Login Flow")
+    # Written by `td generate` next to config.yaml.
+    (tmp_path / ".tandas" / "config.yaml.cache.json").write_text("{}")
+
+    # Another reader (e.g. the daemon) keeps the WAL side files alive.
+    reader = sqlite3.connect(tmp_path / ".tandas" / "db.sqlite")
+    try:
+        reader.execute("SELECT COUNT(*) FROM tandas").fetchone()
+        assert (tmp_path / ".tandas" / "db.sqlite-wal").exists()
+        run_td(tmp_path, "sync")
+    finally:
+        reader.close()
+
+    staged = subprocess.run(
+        ["git", "diff", "--cached", "--name-only"], cwd=tmp_path, capture_output=True, text=True, check=True
+    ).stdout.split()
+    assert sorted(staged) == [".tandas/db.sqlite", ".tandas/issues.jsonl"]
+
+    # A later sync with issues.jsonl untouched still stages the other registry files.
+    trace_dir = tmp_path / "test-results"
+    trace_dir.mkdir()
+    (trace_dir / "login-trace.zip").write_text("dummy")
+    run_td(tmp_path, "trace", "scan", "--dir", str(trace_dir))
+    assert "Staged" in run_td(tmp_path, "sync").stdout
+    staged = subprocess.run(
+        ["git", "diff", "--cached", "--name-only"], cwd=tmp_path, capture_output=True, text=True, check=True
+    ).stdout.split()
+    assert ".tandas/trace_inbox.jsonl" in staged
+
+
+def test_trace_append_racing_the_daemon_keeps_its_entry(tmp_path, monkeypatch):
+    run_td(tmp_path, "init")
+    monkeypatch.chdir(tmp_path)
+    inbox = tmp_path / ".tandas" / "trace_inbox.jsonl"
+    load_inbox = td.trace_inbox_db
+
+    def daemon_appends_after_load():
+        conn = load_inbox()
+        with inbox.open("a") as handle:
+            handle.write(json.dumps({"path": "daemon.zip", "status": "pending"}) + "\n")
+        return conn
+
+    try:
+        with mock.patch.object(td, "trace_inbox_db", daemon_appends_after_load):
+            td.append_trace_inbox_entries([{"path": "local.zip"}])
+        assert td.update_trace_entry("local.zip", status="linked")
+    finally:
+        _reset_td_state()
+
+    assert {(e["path"], e["status"]) for e in load_trace_entries(tmp_path)} == {
+        ("daemon.zip", "pending"),
+        ("local.zip", "linked"),
+    }